@@ -0,0 +1,82 @@
+import { createServer } from 'http'
+import { Server } from 'socket.io'
+
+// Pushes note changes to every connected client of the note's author.
+// Clients connect over socket.io and send 'subscribe' with their user id;
+// the Next.js API routes POST { authorId, event } to the publish port.
+
+const httpServer = createServer()
+const io = new Server(httpServer, {
+  // DO NOT change the path, it is used by Caddy to forward the request to the correct port
+  path: '/',
+  cors: {
+    origin: "*",
+    methods: ["GET", "POST"]
+  },
+  pingTimeout: 60000,
+  pingInterval: 25000,
+})
+
+const userRoom = (userId: string) => `user:${userId}`
+
+io.on('connection', (socket) => {
+  socket.on('subscribe', (data: { userId: string }) => {
+    if (data?.userId) {
+      socket.join(userRoom(data.userId))
+    }
+  })
+
+  socket.on('error', (error) => {
+    console.error(`Socket error (${socket.id}):`, error)
+  })
+})
+
+// Internal only: bound to loopback so events can't be forged from outside
+const publishServer = createServer((req, res) => {
+  if (req.method !== 'POST' || req.url !== '/publish') {
+    res.writeHead(404).end()
+    return
+  }
+
+  let body = ''
+  req.on('data', (chunk) => {
+    body += chunk
+  })
+  req.on('end', () => {
+    try {
+      const { authorId, event } = JSON.parse(body)
+      if (!authorId || !event) {
+        res.writeHead(400).end()
+        return
+      }
+      io.to(userRoom(authorId)).emit('note-event', event)
+      res.writeHead(204).end()
+    } catch {
+      res.writeHead(400).end()
+    }
+  })
+})
+
+const PORT = 3003
+const PUBLISH_PORT = 3004
+
+httpServer.listen(PORT, () => {
+  console.log(`Note events server running on port ${PORT}`)
+})
+
+publishServer.listen(PUBLISH_PORT, '127.0.0.1', () => {
+  console.log(`Note events publish endpoint on 127.0.0.1:${PUBLISH_PORT}`)
+})
+
+// Graceful shutdown
+const shutdown = (signal: string) => {
+  console.log(`Received ${signal} signal, shutting down server...`)
+  publishServer.close()
+  httpServer.close(() => {
+    console.log('Note events server closed')
+    process.exit(0)
+  })
+}
+
+process.on('SIGTERM', () => shutdown('SIGTERM'))
+process.on('SIGINT', () => shutdown('SIGINT'))
@@ -11,15 +11,29 @@ Features:
 - Beautiful animations
 """
 
+import time
+STARTUP_TIME = time.perf_counter()
+
 import flet as ft
 import asyncio
+import atexit
+import base64
 import json
 import os
 import hashlib
+import re
+import uuid
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from bisect import bisect_left, insort
 from datetime import datetime
+from difflib import SequenceMatcher
 from typing import Optional, List, Dict, Any
-import httpx
+from urllib.parse import urlencode
+import sqlite3
 import threading
+import struct
+import zlib
 
 # ============================================
 # CONFIGURATION
@@ -43,117 +57,1260 @@ COLORS = {
     "offline_text": "#78350f",
 }
 
+# Offline storage backend: "journal" (snapshot + journal) or "sqlite"
+STORAGE_BACKEND = "journal"
+
+# Journal backend encoding: "json" (readable) or "msgpack" (compact binary, needs msgpack).
+# Note bodies of at least STORAGE_COMPRESS_MIN_SIZE characters can be stored
+# compressed with "zlib" or "zstd" (needs zstandard); None stores them as text.
+STORAGE_FORMAT = "json"
+STORAGE_COMPRESSION = None
+STORAGE_COMPRESS_MIN_SIZE = 1024
+
+# List notes as summaries (title, preview, lock state) and load bodies on open
+SUMMARY_NOTE_LIST = False
+NOTE_CACHE_SIZE = 50
+RECENT_NOTES_PREFETCH = 10
+
+# Notes sidebar: above VIRTUAL_LIST_THRESHOLD notes only the cards in view are built
+VIRTUAL_LIST_THRESHOLD = 300
+VIRTUAL_LIST_OVERSCAN = 5
+NOTE_CARD_HEIGHT = 72
+NOTE_CARD_GAP = 8
+
+# Editor autosave: save after this long without typing, or at most this long after the first edit (seconds)
+AUTOSAVE_IDLE_DELAY = 1.0
+AUTOSAVE_MAX_DELAY = 5.0
+
+# Minimum time between UI flushes to the Flet client (seconds)
+UI_FRAME_INTERVAL = 1 / 60
+
+# Print time-to-first-paint and other startup milestones
+STARTUP_LOG = True
+
+# Reuse get_me / get_notes results for this long; any write or connectivity change drops them (seconds)
+RESPONSE_CACHE_TTL = 2.0
+
+# Request lanes: interactive requests always go first; background sync and
+# prefetch share a concurrency cap and a rate cap (requests per second)
+INTERACTIVE_CONCURRENCY = 8
+BACKGROUND_CONCURRENCY = 4
+BACKGROUND_RATE = 50
+
+# Socket.io endpoint of the note-events service that pushes note changes (needs python-socketio)
+EVENTS_URL = "http://localhost:3003"
+
+# Circuit breaker: open after this many consecutive connection failures, then
+# probe the server after CIRCUIT_RESET_TIMEOUT, doubling up to CIRCUIT_MAX_TIMEOUT (seconds)
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_RESET_TIMEOUT = 5.0
+CIRCUIT_MAX_TIMEOUT = 60.0
+
+# Connection monitor intervals (seconds)
+MONITOR_HEALTHY_INTERVAL = 30
+MONITOR_OFFLINE_MIN_INTERVAL = 2
+MONITOR_OFFLINE_MAX_INTERVAL = 30
+
 # ============================================
-# OFFLINE STORAGE (Local JSON)
+# SYNC QUEUE COMPACTION
 # ============================================
 
-class OfflineStorage:
-    """Handles local storage for offline mode"""
+def merge_sync_item(queue: List[Dict], item: Dict):
+    """Fold a new sync queue item into the queue in place
+
+    - update after create/update: merged into the earlier item
+    - delete after create: both dropped, the server never saw the note
+    - delete after update: the update is dropped
+    """
+    note_id = item["data"]["id"]
+    prev_index = next(
+        (i for i in range(len(queue) - 1, -1, -1) if queue[i]["data"]["id"] == note_id),
+        None
+    )
+    prev = queue[prev_index] if prev_index is not None else None
     
-    STORAGE_FILE = "notex_offline_data.json"
+    if prev and item["action"] == "update":
+        if prev["action"] == "create":
+            queue[prev_index] = {**prev, "data": {**prev["data"], **item["data"]["data"]}}
+            return
+        if prev["action"] == "update":
+            queue[prev_index] = {
+                **item,
+                "data": {"id": note_id, "data": {**prev["data"]["data"], **item["data"]["data"]}},
+            }
+            return
+    elif prev and item["action"] == "delete":
+        if prev["action"] == "create":
+            del queue[prev_index]
+            return
+        if prev["action"] == "update":
+            del queue[prev_index]
     
-    def __init__(self):
+    queue.append(item)
+
+
+def compact_sync_queue(queue: List[Dict]) -> List[Dict]:
+    """Collapse redundant operations so each note needs at most one request"""
+    compacted = []
+    for item in queue:
+        merge_sync_item(compacted, item)
+    return compacted
+
+
+# ============================================
+# OFFLINE STORAGE (Local JSON + Journal)
+# ============================================
+
+class StoreSerializer:
+    """Encodes offline store snapshots and journal records
+
+    "json" writes one JSON document per snapshot and one line per journal
+    record. "msgpack" writes MessagePack, with journal records framed by
+    length and CRC32 so a torn tail write is detected. Either way, long
+    note bodies can be compressed; compressed bodies are tagged with their
+    codec so any serializer can read them back.
+    """
+    
+    SUFFIXES = {"json": (".json", ".journal"), "msgpack": (".msgpack", ".mpjournal")}
+    FRAME_HEADER = struct.Struct(">II")
+    
+    def __init__(self, format: str = STORAGE_FORMAT, compression: Optional[str] = STORAGE_COMPRESSION,
+                 compress_min_size: int = STORAGE_COMPRESS_MIN_SIZE):
+        self._msgpack = None
+        if format == "msgpack":
+            try:
+                import msgpack
+                self._msgpack = msgpack
+            except ImportError:
+                print("msgpack is not installed; storing offline data as JSON")
+                format = "json"
+        if compression == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                print("zstandard is not installed; compressing note bodies with zlib")
+                compression = "zlib"
+        self.format = format
+        self.compression = compression
+        self.compress_min_size = compress_min_size
+    
+    def paths(self, base: str) -> tuple:
+        """Snapshot and journal file names for this format"""
+        snapshot, journal = self.SUFFIXES[self.format]
+        return base + snapshot, base + journal
+    
+    def dumps(self, obj: Any) -> bytes:
+        if self.compression:
+            obj = self._map_bodies(obj, self._compress)
+        if self._msgpack:
+            return self._msgpack.packb(obj, use_bin_type=True)
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    
+    def loads(self, raw: bytes) -> Any:
+        obj = self._msgpack.unpackb(raw, raw=False) if self._msgpack else json.loads(raw)
+        return self._map_bodies(obj, self._decompress)
+    
+    def frame(self, record: Dict) -> bytes:
+        payload = self.dumps(record)
+        if self._msgpack:
+            return self.FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        return payload + b"\n"
+    
+    def frames(self, raw: bytes):
+        """Yield (record, frame bytes) per journal record; record is None for a torn one"""
+        if not self._msgpack:
+            for line in raw.splitlines(True):
+                try:
+                    yield self.loads(line), line
+                except ValueError:
+                    yield None, line
+            return
+        
+        pos = 0
+        while pos < len(raw):
+            end = pos + self.FRAME_HEADER.size
+            if end > len(raw):
+                yield None, raw[pos:]
+                return
+            size, crc = self.FRAME_HEADER.unpack_from(raw, pos)
+            payload = raw[end:end + size]
+            if len(payload) < size or zlib.crc32(payload) != crc:
+                # Nothing after a torn frame can be trusted
+                yield None, raw[pos:]
+                return
+            yield self.loads(payload), raw[pos:end + size]
+            pos = end + size
+    
+    def _map_bodies(self, obj: Any, convert):
+        """Apply `convert` to every "content" value in nested dicts and lists"""
+        if isinstance(obj, list):
+            return [self._map_bodies(v, convert) for v in obj]
+        if isinstance(obj, dict):
+            return {k: convert(v) if k == "content" else self._map_bodies(v, convert) for k, v in obj.items()}
+        return obj
+    
+    def _compress(self, text: Any) -> Any:
+        if not isinstance(text, str) or len(text) < self.compress_min_size:
+            return text
+        raw = text.encode("utf-8")
+        if self.compression == "zstd":
+            import zstandard
+            data = zstandard.ZstdCompressor().compress(raw)
+        else:
+            data = zlib.compress(raw)
+        if not self._msgpack:
+            data = base64.b64encode(data).decode("ascii")
+        return {"$body": self.compression, "data": data}
+    
+    @staticmethod
+    def _decompress(value: Any) -> Any:
+        if not isinstance(value, dict) or "$body" not in value:
+            return value
+        data = value["data"]
+        if isinstance(data, str):
+            data = base64.b64decode(data)
+        if value["$body"] == "zstd":
+            import zstandard
+            return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+        return zlib.decompress(data).decode("utf-8")
+
+
+class FlushScheduler:
+    """Calls a storage flush from a background thread once it is marked dirty
+
+    Flushes happen every `interval` seconds while dirty, or straight away
+    once `threshold` pending writes have piled up. Pending writes are also
+    flushed at interpreter exit.
+    """
+    
+    def __init__(self, flush, interval: float = 1.0, threshold: int = 50):
+        self._flush = flush
+        self.interval = interval
+        self.threshold = threshold
+        self._pending = 0
+        self._wake = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+        atexit.register(self._flush)
+    
+    def mark_dirty(self):
+        self._pending += 1
+        if self._pending >= self.threshold:
+            self._wake.set()
+    
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._pending:
+                self._pending = 0
+                try:
+                    self._flush()
+                except Exception as e:
+                    print(f"Failed to flush offline data: {e}")
+
+
+class OfflineStorage:
+    """Handles local storage for offline mode
+
+    Notes live in one map keyed by id. Each record carries its origin
+    ("server" or "local") and a dirty flag for unsynced local edits, which
+    server updates never overwrite. An index on updatedAt keeps get_notes
+    a plain ordered view.
+    
+    Every mutation is applied in memory and queued as a small journal
+    record; a FlushScheduler appends the queued records in one write.
+    Once the journal grows past COMPACT_THRESHOLD records a background
+    thread folds it into the snapshot file. Startup replays the snapshot
+    plus the tail.
+    """
+    
+    BASE_NAME = "notex_offline_data"
+    COMPACT_THRESHOLD = 200
+    FLUSH_INTERVAL = 1.0
+    FLUSH_THRESHOLD = 50
+    
+    def __init__(self, serializer: StoreSerializer = None):
+        self.serializer = serializer or StoreSerializer()
+        self.storage_file, self.journal_file = self.serializer.paths(self.BASE_NAME)
+        self._lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        self._seq = 0
+        self._keys: Dict[str, tuple] = {}
+        self._order: List[tuple] = []
+        self._pending = []
+        self._journal_records = 0
+        self._compacting = False
         self.data = self._load()
+        self._flusher = FlushScheduler(self.flush, self.FLUSH_INTERVAL, self.FLUSH_THRESHOLD)
+    
+    def _empty(self) -> Dict:
+        return {
+            "user": None,
+            "notes": {},
+            "sync_queue": [],
+            "meta": {},
+            "edit_bases": {}
+        }
+    
+    @staticmethod
+    def _migrate(data: Dict):
+        """Fold the old separate online_notes / notes lists into the keyed record map"""
+        if not isinstance(data.get("notes"), list) and "online_notes" not in data:
+            return
+        local = data["notes"] if isinstance(data.get("notes"), list) else []
+        records = {n["id"]: {"note": n, "origin": "server", "dirty": False} for n in data.pop("online_notes", [])}
+        # Only notes with changes still waiting to sync are dirty
+        pending = {item["data"]["id"] for item in data.get("sync_queue", [])}
+        for note in reversed(local):
+            origin = "local" if note["id"].startswith("offline-") else "server"
+            records[note["id"]] = {"note": note, "origin": origin, "dirty": note["id"] in pending}
+        data["notes"] = records
+    
+    @staticmethod
+    def _sort_key(note: Dict) -> tuple:
+        return (note.get("updatedAt") or note.get("createdAt") or "", note["id"])
+    
+    def _reorder(self, notes: Dict[str, Dict]):
+        """Rebuild the updatedAt index after a bulk change"""
+        self._keys = {note_id: self._sort_key(r["note"]) for note_id, r in notes.items()}
+        self._order = sorted(self._keys.values())
+    
+    def _put(self, notes: Dict[str, Dict], note: Dict, origin: str, dirty: bool):
+        self._unindex(note["id"])
+        notes[note["id"]] = {"note": note, "origin": origin, "dirty": dirty}
+        key = self._keys[note["id"]] = self._sort_key(note)
+        insort(self._order, key)
+    
+    def _drop(self, notes: Dict[str, Dict], note_id: str):
+        notes.pop(note_id, None)
+        self._unindex(note_id)
+    
+    def _unindex(self, note_id: str):
+        # Keys are remembered per id, since callers may edit note dicts in place
+        key = self._keys.pop(note_id, None)
+        if key is not None:
+            i = bisect_left(self._order, key)
+            if i < len(self._order) and self._order[i] == key:
+                del self._order[i]
+    
+    @classmethod
+    def existing_formats(cls) -> List[str]:
+        """Serializer formats that have a snapshot or journal on disk"""
+        return [
+            fmt for fmt, suffixes in StoreSerializer.SUFFIXES.items()
+            if any(os.path.exists(cls.BASE_NAME + suffix) for suffix in suffixes)
+        ]
     
     def _load(self) -> Dict:
+        serializer = self.serializer
+        files = (self.storage_file, self.journal_file)
+        found = self.existing_formats()
+        if found and self.serializer.format not in found:
+            # Written in another format: read it with that format, then rewrite in ours
+            serializer = StoreSerializer(found[0], compression=None)
+            files = serializer.paths(self.BASE_NAME)
+        
+        data = self._empty()
         try:
-            if os.path.exists(self.STORAGE_FILE):
-                with open(self.STORAGE_FILE, 'r') as f:
-                    return json.load(f)
+            if os.path.exists(files[0]):
+                with open(files[0], 'rb') as f:
+                    data.update(serializer.loads(f.read()))
         except:
             pass
-        return {
-            "user": None,
-            "notes": [],
-            "online_notes": [],
-            "sync_queue": []
-        }
+        self._seq = data.pop("seq", 0)
+        self._migrate(data)
+        self._reorder(data["notes"])
+        
+        torn = False
+        try:
+            if os.path.exists(files[1]):
+                with open(files[1], 'rb') as f:
+                    for record, _ in serializer.frames(f.read()):
+                        if record is None:
+                            # Partial write from a crash; skip it and compact below
+                            torn = True
+                            continue
+                        if record["seq"] <= self._seq:
+                            continue
+                        self._apply(data, record["op"], record["value"])
+                        self._seq = record["seq"]
+                        self._journal_records += 1
+        except Exception as e:
+            print(f"Failed to replay offline journal: {e}")
+        
+        # Edit bases used to be one meta entry; move them to their per-note map
+        legacy_bases = data["meta"].pop("edit_bases", None)
+        if legacy_bases:
+            data["edit_bases"] = {**legacy_bases, **data["edit_bases"]}
+            torn = True
+        
+        if torn or serializer is not self.serializer:
+            self.data = data
+            if self._save() and serializer is not self.serializer:
+                for path in files:
+                    if os.path.exists(path):
+                        os.remove(path)
+        return data
+    
+    def _apply(self, data: Dict, op: str, value: Any):
+        """Apply a single journal record to the in-memory data"""
+        if op == "user":
+            data["user"] = value
+        elif op == "note":
+            # Saved locally: dirty until its changes are synced, and never replaced by server copies
+            current = data["notes"].get(value["id"])
+            self._put(data["notes"], value, current["origin"] if current else "local", True)
+        elif op == "synced":
+            self._put(data["notes"], value, "server", False)
+        elif op == "delete":
+            self._drop(data["notes"], value)
+            data["edit_bases"].pop(value, None)
+        elif op == "online_notes":
+            notes = data["notes"]
+            incoming = {n["id"] for n in value}
+            for note_id in [i for i, r in notes.items() if not r["dirty"] and i not in incoming]:
+                del notes[note_id]
+            for note in value:
+                if not notes.get(note["id"], {}).get("dirty"):
+                    notes[note["id"]] = {"note": note, "origin": "server", "dirty": False}
+            self._reorder(notes)
+        elif op == "online_merge":
+            notes = data["notes"]
+            if value["ids"] is not None:
+                live = set(value["ids"])
+                for note_id in [i for i, r in notes.items() if not r["dirty"] and i not in live]:
+                    self._drop(notes, note_id)
+            for note in value["notes"]:
+                if not notes.get(note["id"], {}).get("dirty"):
+                    self._put(notes, note, "server", False)
+        elif op == "meta":
+            data.setdefault("meta", {})[value["key"]] = value["value"]
+        elif op == "edit_base":
+            if value["base"] is None:
+                data["edit_bases"].pop(value["id"], None)
+            else:
+                data["edit_bases"][value["id"]] = value["base"]
+        elif op == "queue_add":
+            merge_sync_item(data.setdefault("sync_queue", []), value)
+        elif op == "queue_set":
+            data["sync_queue"] = value
+        elif op == "queue_note":
+            queue = [i for i in data.get("sync_queue", []) if i["data"]["id"] != value["id"]]
+            data["sync_queue"] = queue + value["items"]
+        elif op == "queue_clear":
+            data["sync_queue"] = []
+    
+    def _commit(self, op: str, value: Any):
+        """Apply a mutation in memory and queue it for the journal"""
+        with self._lock:
+            self._apply(self.data, op, value)
+            self._seq += 1
+            self._pending.append(self.serializer.frame({"seq": self._seq, "op": op, "value": value}))
+        self._flusher.mark_dirty()
+    
+    def flush(self):
+        """Append all queued records to the journal in a single write"""
+        with self._io_lock:
+            with self._lock:
+                lines, self._pending = self._pending, []
+            if not lines:
+                return
+            try:
+                with open(self.journal_file, 'ab') as f:
+                    f.writelines(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._journal_records += len(lines)
+            except Exception as e:
+                with self._lock:
+                    self._pending = lines + self._pending
+                print(f"Failed to save offline data: {e}")
+                return
+        
+        if self._journal_records >= self.COMPACT_THRESHOLD and not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self._compact, daemon=True).start()
+    
+    def _compact(self):
+        try:
+            self._save()
+        finally:
+            self._compacting = False
     
-    def _save(self):
+    def _save(self) -> bool:
+        """Write a full snapshot and drop the journal records it covers"""
         try:
-            with open(self.STORAGE_FILE, 'w') as f:
-                json.dump(self.data, f, indent=2)
+            with self._lock:
+                snapshot = self.serializer.dumps({**self.data, "seq": self._seq})
+                seq = self._seq
+            
+            tmp = self.storage_file + ".tmp"
+            with open(tmp, 'wb') as f:
+                f.write(snapshot)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.storage_file)
+            
+            with self._io_lock:
+                # Keep records appended while the snapshot was being written
+                tail = []
+                if os.path.exists(self.journal_file):
+                    with open(self.journal_file, 'rb') as f:
+                        tail = [
+                            frame for record, frame in self.serializer.frames(f.read())
+                            if record is not None and record["seq"] > seq
+                        ]
+                with open(self.journal_file + ".tmp", 'wb') as f:
+                    f.writelines(tail)
+                os.replace(self.journal_file + ".tmp", self.journal_file)
+                self._journal_records = len(tail)
+            return True
         except Exception as e:
             print(f"Failed to save offline data: {e}")
+            return False
     
     def get_user(self) -> Optional[Dict]:
         return self.data.get("user")
     
     def set_user(self, user: Optional[Dict]):
-        self.data["user"] = user
-        self._save()
+        self._commit("user", user)
     
     def get_notes(self) -> List[Dict]:
-        online = self.data.get("online_notes", [])
-        offline = self.data.get("notes", [])
-        notes_map = {n["id"]: n for n in online}
-        notes_map.update({n["id"]: n for n in offline})
-        notes = list(notes_map.values())
-        notes.sort(key=lambda x: x.get("updatedAt", x.get("createdAt", "")), reverse=True)
-        return notes
+        """All notes, newest first; local edits stand in for the server copy"""
+        with self._lock:
+            notes = self.data["notes"]
+            return [notes[note_id]["note"] for _, note_id in reversed(self._order)]
+    
+    def get_note(self, note_id: str) -> Optional[Dict]:
+        record = self.data["notes"].get(note_id)
+        return record["note"] if record else None
+    
+    def is_dirty(self, note_id: str) -> bool:
+        record = self.data["notes"].get(note_id)
+        return bool(record and record["dirty"])
     
     def save_note(self, note: Dict):
-        notes = self.data.get("notes", [])
-        existing = next((n for n in notes if n["id"] == note["id"]), None)
-        if existing:
-            notes.remove(existing)
-        notes.insert(0, note)
-        self.data["notes"] = notes
-        self._save()
+        self._commit("note", note)
+    
+    def mark_synced(self, note: Dict):
+        """Store a note as matching the server copy, so server updates apply to it again"""
+        self._commit("synced", note)
     
     def delete_note(self, note_id: str):
-        self.data["notes"] = [n for n in self.data.get("notes", []) if n["id"] != note_id]
-        self._save()
+        self._commit("delete", note_id)
     
     def set_online_notes(self, notes: List[Dict]):
-        self.data["online_notes"] = notes
-        self._save()
+        self._commit("online_notes", notes)
+    
+    def merge_online_notes(self, notes: List[Dict], live_ids: Optional[List[str]] = None):
+        """Upsert changed server notes and drop server notes no longer in live_ids, if given"""
+        self._commit("online_merge", {"notes": notes, "ids": live_ids})
+    
+    def get_meta(self, key: str) -> Any:
+        return self.data.get("meta", {}).get(key)
+    
+    def set_meta(self, key: str, value: Any):
+        self._commit("meta", {"key": key, "value": value})
+    
+    def get_edit_base(self, note_id: str) -> Optional[Dict]:
+        return self.data["edit_bases"].get(note_id)
+    
+    def set_edit_base(self, note_id: str, base: Optional[Dict]):
+        """Store or, with None, clear the server version a note's offline edits start from"""
+        self._commit("edit_base", {"id": note_id, "base": base})
     
     def add_to_sync_queue(self, action: str, data: Dict):
-        self.data.setdefault("sync_queue", []).append({
+        self._commit("queue_add", {
             "action": action,
             "data": data,
             "timestamp": datetime.now().isoformat()
         })
-        self._save()
     
     def get_sync_queue(self) -> List[Dict]:
         return self.data.get("sync_queue", [])
     
+    def set_sync_queue(self, queue: List[Dict]):
+        self._commit("queue_set", queue)
+    
+    def set_note_queue(self, note_id: str, items: List[Dict]):
+        """Replace the queued operations for one note, leaving the rest of the queue alone"""
+        self._commit("queue_note", {"id": note_id, "items": items})
+    
+    def clear_sync_queue(self):
+        self._commit("queue_clear", None)
+
+
+class SQLiteOfflineStorage:
+    """Same API as OfflineStorage, persisted to an embedded SQLite database
+
+    Notes are keyed by id and indexed on updatedAt, so single-note writes
+    are O(log n) and get_notes is an index scan instead of a merge and sort.
+    """
+    
+    DB_FILE = "notex_offline_data.db"
+    FLUSH_INTERVAL = 1.0
+    FLUSH_THRESHOLD = 50
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS user (
+            key INTEGER PRIMARY KEY CHECK (key = 0),
+            data TEXT
+        );
+        CREATE TABLE IF NOT EXISTS notes (
+            id TEXT PRIMARY KEY,
+            updated_at TEXT NOT NULL DEFAULT '',
+            local INTEGER NOT NULL DEFAULT 0,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_notes_updated_at ON notes (updated_at);
+        CREATE TABLE IF NOT EXISTS sync_queue (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            note_id TEXT NOT NULL,
+            action TEXT NOT NULL,
+            data TEXT NOT NULL,
+            timestamp TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_sync_queue_note_id ON sync_queue (note_id);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS edit_bases (
+            note_id TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        is_new = not os.path.exists(self.DB_FILE)
+        self.conn = sqlite3.connect(self.DB_FILE, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        if is_new and OfflineStorage.existing_formats():
+            self._import_json()
+        self._migrate_edit_bases()
+        self._flusher = FlushScheduler(self.flush, self.FLUSH_INTERVAL, self.FLUSH_THRESHOLD)
+    
+    def flush(self):
+        """Commit the open write transaction, coalescing all writes since the last flush"""
+        with self._lock:
+            self.conn.commit()
+    
+    def _write(self, sql: str, params: Any = (), many: bool = False):
+        with self._lock:
+            if many:
+                self.conn.executemany(sql, params)
+            else:
+                self.conn.execute(sql, params)
+        self._flusher.mark_dirty()
+    
+    def _import_json(self):
+        """Carry over data from the journal backend on first run"""
+        legacy = OfflineStorage().data
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO user (key, data) VALUES (0, ?)",
+                              (json.dumps(legacy.get("user")),))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO notes (id, updated_at, local, data) VALUES (?, ?, ?, ?)",
+                [self._note_row(r["note"], local=int(r["dirty"])) for r in legacy["notes"].values()]
+            )
+            self.conn.executemany(
+                "INSERT INTO sync_queue (note_id, action, data, timestamp) VALUES (?, ?, ?, ?)",
+                [self._queue_row(i) for i in compact_sync_queue(legacy.get("sync_queue", []))]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in legacy.get("meta", {}).items()]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO edit_bases (note_id, data) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in legacy.get("edit_bases", {}).items()]
+            )
+    
+    def _migrate_edit_bases(self):
+        """Move edit bases out of the single meta entry they used to share"""
+        with self._lock, self.conn:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'edit_bases'").fetchone()
+            if not row:
+                return
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO edit_bases (note_id, data) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in (json.loads(row[0]) or {}).items()]
+            )
+            self.conn.execute("DELETE FROM meta WHERE key = 'edit_bases'")
+    
+    @staticmethod
+    def _note_row(note: Dict, local: int = 1) -> tuple:
+        return (note["id"], note.get("updatedAt", note.get("createdAt", "")), local, json.dumps(note))
+    
+    @staticmethod
+    def _queue_row(item: Dict) -> tuple:
+        return (item["data"]["id"], item["action"], json.dumps(item["data"]), item.get("timestamp", ""))
+    
+    def get_user(self) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM user WHERE key = 0").fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+    
+    def set_user(self, user: Optional[Dict]):
+        self._write("INSERT OR REPLACE INTO user (key, data) VALUES (0, ?)", (json.dumps(user),))
+    
+    def get_notes(self) -> List[Dict]:
+        with self._lock:
+            rows = self.conn.execute("SELECT data FROM notes ORDER BY updated_at DESC").fetchall()
+        return [json.loads(r[0]) for r in rows]
+    
+    def get_note(self, note_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM notes WHERE id = ?", (note_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def is_dirty(self, note_id: str) -> bool:
+        with self._lock:
+            row = self.conn.execute("SELECT local FROM notes WHERE id = ?", (note_id,)).fetchone()
+        return bool(row and row[0])
+    
+    def mark_synced(self, note: Dict):
+        self._write(
+            "INSERT OR REPLACE INTO notes (id, updated_at, local, data) VALUES (?, ?, ?, ?)",
+            self._note_row(note, local=0)
+        )
+    
+    def save_note(self, note: Dict):
+        self._write(
+            "INSERT OR REPLACE INTO notes (id, updated_at, local, data) VALUES (?, ?, ?, ?)",
+            self._note_row(note)
+        )
+    
+    def delete_note(self, note_id: str):
+        with self._lock:
+            self._write("DELETE FROM notes WHERE id = ?", (note_id,))
+            self._write("DELETE FROM edit_bases WHERE note_id = ?", (note_id,))
+    
+    def set_online_notes(self, notes: List[Dict]):
+        # Locally saved notes take precedence over the server copy, as in OfflineStorage
+        with self._lock:
+            self._write("DELETE FROM notes WHERE local = 0")
+            self._write(
+                "INSERT OR IGNORE INTO notes (id, updated_at, local, data) VALUES (?, ?, ?, ?)",
+                [self._note_row(n, local=0) for n in notes],
+                many=True
+            )
+    
+    def merge_online_notes(self, notes: List[Dict], live_ids: Optional[List[str]] = None):
+        """Upsert changed server notes and drop server notes no longer in live_ids, if given"""
+        with self._lock:
+            if live_ids is not None:
+                live = set(live_ids)
+                gone = [
+                    (r[0],) for r in self.conn.execute("SELECT id FROM notes WHERE local = 0")
+                    if r[0] not in live
+                ]
+                self._write("DELETE FROM notes WHERE id = ? AND local = 0", gone, many=True)
+            self._write(
+                """INSERT INTO notes (id, updated_at, local, data) VALUES (?, ?, ?, ?)
+                   ON CONFLICT (id) DO UPDATE SET updated_at = excluded.updated_at, data = excluded.data
+                   WHERE local = 0""",
+                [self._note_row(n, local=0) for n in notes],
+                many=True
+            )
+    
+    def get_meta(self, key: str) -> Any:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def set_meta(self, key: str, value: Any):
+        self._write("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+    
+    def get_edit_base(self, note_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM edit_bases WHERE note_id = ?", (note_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def set_edit_base(self, note_id: str, base: Optional[Dict]):
+        """Store or, with None, clear the server version a note's offline edits start from"""
+        if base is None:
+            self._write("DELETE FROM edit_bases WHERE note_id = ?", (note_id,))
+        else:
+            self._write("INSERT OR REPLACE INTO edit_bases (note_id, data) VALUES (?, ?)", (note_id, json.dumps(base)))
+    
+    def add_to_sync_queue(self, action: str, data: Dict):
+        item = {"action": action, "data": data, "timestamp": datetime.now().isoformat()}
+        with self._lock:
+            # Merge against the pending items for this note only
+            rows = self.conn.execute(
+                "SELECT seq, action, data, timestamp FROM sync_queue WHERE note_id = ? ORDER BY seq",
+                (data["id"],)
+            ).fetchall()
+            items = [{"seq": q, "action": a, "data": json.loads(d), "timestamp": t} for q, a, d, t in rows]
+            merge_sync_item(items, item)
+            self._write("DELETE FROM sync_queue WHERE note_id = ?", (data["id"],))
+            self._write(
+                "INSERT INTO sync_queue (seq, note_id, action, data, timestamp) VALUES (?, ?, ?, ?, ?)",
+                [(i.get("seq"),) + self._queue_row(i) for i in items],
+                many=True
+            )
+    
+    def get_sync_queue(self) -> List[Dict]:
+        with self._lock:
+            rows = self.conn.execute("SELECT action, data, timestamp FROM sync_queue ORDER BY seq").fetchall()
+        return [{"action": a, "data": json.loads(d), "timestamp": t} for a, d, t in rows]
+    
+    def set_sync_queue(self, queue: List[Dict]):
+        with self._lock:
+            self._write("DELETE FROM sync_queue")
+            self._write(
+                "INSERT INTO sync_queue (note_id, action, data, timestamp) VALUES (?, ?, ?, ?)",
+                [self._queue_row(i) for i in queue],
+                many=True
+            )
+    
+    def set_note_queue(self, note_id: str, items: List[Dict]):
+        """Replace the queued operations for one note, leaving the rest of the queue alone"""
+        with self._lock:
+            self._write("DELETE FROM sync_queue WHERE note_id = ?", (note_id,))
+            self._write(
+                "INSERT INTO sync_queue (note_id, action, data, timestamp) VALUES (?, ?, ?, ?)",
+                [self._queue_row(i) for i in items],
+                many=True
+            )
+    
     def clear_sync_queue(self):
-        self.data["sync_queue"] = []
-        self._save()
+        self._write("DELETE FROM sync_queue")
 
 
 # ============================================
 # API CLIENT
 # ============================================
 
+def make_text_patch(old: str, new: str) -> Dict:
+    """Describe `new` as a single splice of `old`
+
+    Offsets are in UTF-16 code units to match JavaScript string indexing
+    on the server.
+    """
+    # Binary search on slice equality keeps the comparisons in C
+    lo, hi = 0, min(len(old), len(new))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[:mid] == new[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    start = lo
+    
+    lo, hi = 0, min(len(old), len(new)) - start
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[len(old) - mid:] == new[len(new) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    end = lo
+    
+    def utf16_len(text: str) -> int:
+        return len(text.encode("utf-16-le")) // 2
+    
+    offset = utf16_len(old[:start])
+    return {
+        "start": offset,
+        "end": offset + utf16_len(old[start:len(old) - end]),
+        "text": new[start:len(new) - end],
+        "baseHash": hashlib.sha256(old.encode("utf-8")).hexdigest(),
+    }
+
+
+def merge_text(base: str, local: str, remote: str) -> tuple:
+    """Line-level three-way merge of two edits of `base`
+
+    Returns (merged, conflicted). Where both sides changed the same lines
+    differently, both versions are kept between conflict markers.
+    """
+    if local == remote or remote == base:
+        return local, False
+    if local == base:
+        return remote, False
+    
+    b, sides = base.splitlines(True), (local.splitlines(True), remote.splitlines(True))
+    edits = sorted(
+        (i1, i2, j1, j2, side)
+        for side, lines in enumerate(sides)
+        for tag, i1, i2, j1, j2 in SequenceMatcher(None, b, lines, autojunk=False).get_opcodes()
+        if tag != "equal"
+    )
+    
+    def side_text(group, side, start, end):
+        out, pos = [], start
+        for i1, i2, j1, j2, s in group:
+            if s == side:
+                out += b[pos:i1] + sides[side][j1:j2]
+                pos = i2
+        return out + b[pos:end]
+    
+    merged, pos, conflicted, k = [], 0, False, 0
+    while k < len(edits):
+        # Hunks that overlap in the base, or start at the same line, are decided together
+        start, end = edits[k][0], edits[k][1]
+        group = [edits[k]]
+        k += 1
+        while k < len(edits) and (edits[k][0] < end or edits[k][0] == start):
+            end = max(end, edits[k][1])
+            group.append(edits[k])
+            k += 1
+        
+        merged += b[pos:start]
+        ours, theirs = side_text(group, 0, start, end), side_text(group, 1, start, end)
+        if not any(e[4] == 1 for e in group) or ours == theirs:
+            merged += ours
+        elif not any(e[4] == 0 for e in group):
+            merged += theirs
+        else:
+            conflicted = True
+            for marker, lines in (("<<<<<<< local\n", ours), ("=======\n", theirs)):
+                merged.append(marker)
+                merged += lines
+                if lines and not lines[-1].endswith("\n"):
+                    merged.append("\n")
+            merged.append(">>>>>>> server\n")
+        pos = end
+    return "".join(merged + b[pos:]), conflicted
+
+
+class NoteCache:
+    """Bounded LRU cache of note bodies, keyed by note id and updatedAt"""
+    
+    def __init__(self, capacity: int = NOTE_CACHE_SIZE):
+        self.capacity = capacity
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+    
+    def get(self, note_id: str, version: str) -> Optional[str]:
+        item = self._items.get(note_id)
+        if item is None or item[0] != version:
+            return None
+        self._items.move_to_end(note_id)
+        return item[1]
+    
+    def peek(self, note_id: str) -> Optional[tuple]:
+        """Return (version, content) for a note regardless of version"""
+        return self._items.get(note_id)
+    
+    def put(self, note_id: str, version: str, content: str):
+        self._items[note_id] = (version, content)
+        self._items.move_to_end(note_id)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+    
+    def discard(self, note_id: str):
+        self._items.pop(note_id, None)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops calling a server that keeps failing to connect
+
+    closed: requests go through and consecutive failures are counted.
+    open: requests fail at once until the retry time.
+    half-open: one probe goes through; success closes the circuit, failure
+    opens it again for twice as long, up to `max_timeout`.
+    """
+    
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT, max_timeout: float = CIRCUIT_MAX_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.timeout = reset_timeout
+        self.retry_at = 0.0
+    
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        now = time.monotonic()
+        if now < self.retry_at:
+            return False
+        # Let one probe through; another is allowed if it never reports back
+        self.state = "half-open"
+        self.retry_at = now + self.timeout
+        return True
+    
+    def retry_in(self) -> float:
+        return max(self.retry_at - time.monotonic(), 0)
+    
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.timeout = self.reset_timeout
+    
+    def record_failure(self) -> bool:
+        """Count a connection failure; returns whether the circuit (re)opened"""
+        if self.state == "half-open":
+            self.timeout = min(self.timeout * 2, self.max_timeout)
+        else:
+            self.failures += 1
+            if self.state == "open" or self.failures < self.failure_threshold:
+                return False
+        self.state = "open"
+        self.retry_at = time.monotonic() + self.timeout
+        return True
+
+
+class RequestScheduler:
+    """Hands out request slots by lane, highest priority first
+
+    Lanes are listed in priority order; a lane only starts requests while
+    no higher lane has any waiting. Each lane has a concurrency cap and an
+    optional rate cap in requests per second.
+    """
+    
+    def __init__(self, lanes: Dict[str, tuple] = None):
+        self.lanes = lanes or {
+            "interactive": (INTERACTIVE_CONCURRENCY, None),
+            "background": (BACKGROUND_CONCURRENCY, BACKGROUND_RATE),
+        }
+        self._waiters = {lane: deque() for lane in self.lanes}
+        self._active = dict.fromkeys(self.lanes, 0)
+        self._next_start = dict.fromkeys(self.lanes, 0.0)
+        self._stats = {lane: {"started": 0, "max_queued": 0, "wait_total": 0.0} for lane in self.lanes}
+        self._wakeup = None
+    
+    @asynccontextmanager
+    async def slot(self, lane: str):
+        await self._acquire(lane)
+        try:
+            yield
+        finally:
+            self._release(lane)
+    
+    def stats(self) -> Dict[str, Dict]:
+        """Queue depth, in-flight count and wait times per lane"""
+        return {
+            lane: {
+                "queued": len(self._waiters[lane]),
+                "active": self._active[lane],
+                "max_queued": stats["max_queued"],
+                "started": stats["started"],
+                "avg_wait": stats["wait_total"] / stats["started"] if stats["started"] else 0.0,
+            }
+            for lane, stats in self._stats.items()
+        }
+    
+    async def _acquire(self, lane: str):
+        waiters = self._waiters[lane]
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (waiter, time.monotonic())
+        waiters.append(entry)
+        stats = self._stats[lane]
+        stats["max_queued"] = max(stats["max_queued"], len(waiters))
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot just as it was cancelled
+                self._release(lane)
+            elif entry in waiters:
+                waiters.remove(entry)
+                self._dispatch()
+            raise
+    
+    def _release(self, lane: str):
+        self._active[lane] -= 1
+        self._dispatch()
+    
+    def _dispatch(self):
+        now = time.monotonic()
+        for lane, (concurrency, rate) in self.lanes.items():
+            waiters = self._waiters[lane]
+            while waiters and self._active[lane] < concurrency:
+                if rate and now < self._next_start[lane]:
+                    self._wake_at(self._next_start[lane])
+                    break
+                waiter, queued_at = waiters.popleft()
+                if waiter.done():
+                    continue
+                self._active[lane] += 1
+                if rate:
+                    self._next_start[lane] = max(now, self._next_start[lane]) + 1 / rate
+                stats = self._stats[lane]
+                stats["started"] += 1
+                stats["wait_total"] += now - queued_at
+                waiter.set_result(None)
+            if waiters:
+                # Lower lanes wait until this one has drained
+                return
+    
+    def _wake_at(self, when: float):
+        if self._wakeup is None or self._wakeup.cancelled():
+            loop = asyncio.get_running_loop()
+            self._wakeup = loop.call_later(max(when - time.monotonic(), 0), self._wake)
+    
+    def _wake(self):
+        self._wakeup = None
+        self._dispatch()
+
+
 class APIClient:
     """Handles API communication with offline support"""
     
-    def __init__(self, storage: OfflineStorage, base_url: str = "http://localhost:3000"):
+    def __init__(self, storage: OfflineStorage, base_url: str = "http://localhost:3000",
+                 sync_concurrency: int = 4, summary_list: bool = False):
         self.storage = storage
         self.base_url = base_url
+        self.sync_concurrency = sync_concurrency
+        self.summary_list = summary_list
+        self.note_cache = NoteCache()
         self.is_online = True
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.last_success = 0.0
+        self._status_changed = None
+        self.on_note_id_changed = None
+        self.on_note_event = None
+        self.on_sync_conflict = None
+        self._events = None
+        self._events_user = None
+        self.breaker = CircuitBreaker()
+        self.scheduler = RequestScheduler()
+        self._probe_task = None
+        self._in_flight: Dict[str, tuple] = {}
+        self._responses: Dict[str, tuple] = {}
+        self._generation = 0
+        self._syncing = False
+        self._sync_again = False
+        self._sync_task = None
+        self._id_map: Dict[str, str] = {}
+        self._client = None
+    
+    @property
+    def client(self):
+        """HTTP client, created (and httpx imported) on first use to keep startup fast"""
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(timeout=30.0)
+        return self._client
+    
+    @client.setter
+    def client(self, client):
+        self._client = client
+    
+    @property
+    def status_changed(self) -> asyncio.Event:
+        """Set when is_online flips; created inside the event loop, not the thread building the app"""
+        if self._status_changed is None:
+            self._status_changed = asyncio.Event()
+        return self._status_changed
+    
+    def _set_online(self, online: bool):
+        if online != self.is_online:
+            self.is_online = online
+            self._invalidate_responses()
+            self.status_changed.set()
+    
+    def _invalidate_responses(self):
+        """Forget cached results; calls already in flight won't be shared or cached either"""
+        self._generation += 1
+        self._responses.clear()
+    
+    async def _coalesced(self, key: str, fetch):
+        """Run an idempotent call once for all concurrent callers and reuse its result briefly"""
+        cached = self._responses.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        generation, task = self._in_flight.get(key, (None, None))
+        if task is None or generation != self._generation:
+            generation, task = self._generation, asyncio.ensure_future(fetch())
+            self._in_flight[key] = (generation, task)
+            
+            def done(t):
+                if self._in_flight.get(key, (None, None))[1] is t:
+                    del self._in_flight[key]
+                if t.cancelled() or t.exception() is not None or generation != self._generation:
+                    return
+                result = t.result()
+                if not (isinstance(result, dict) and result.get("error")):
+                    self._responses[key] = (time.monotonic() + RESPONSE_CACHE_TTL, result)
+            task.add_done_callback(done)
+        # One caller giving up must not cancel the call for the others
+        return await asyncio.shield(task)
+    
+    async def _request(self, method: str, path: str, lane: str = "interactive", **kwargs) -> "httpx.Response":
+        """Send a request; its outcome doubles as a passive connectivity probe"""
+        import httpx
+        if not self.breaker.allow():
+            self._set_online(False)
+            raise CircuitOpenError(path)
+        try:
+            if method != "GET":
+                self._invalidate_responses()
+            async with self.scheduler.slot(lane):
+                response = await self.client.request(method, f"{self.base_url}{path}", **kwargs)
+        except httpx.TransportError:
+            if self.breaker.record_failure():
+                self._schedule_probe()
+            self._set_online(False)
+            raise
+        self.breaker.record_success()
+        self.last_success = time.monotonic()
+        self._set_online(True)
+        return response
+    
+    def _schedule_probe(self):
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.get_running_loop().create_task(self._probe_until_closed())
+    
+    async def _probe_until_closed(self):
+        """Half-open the circuit on its timer until a health check gets through"""
+        while self.breaker.state != "closed":
+            await asyncio.sleep(self.breaker.retry_in())
+            await self.check_connection()
+    
+    async def _conditional_get(self, path: str, params: Dict = None, have_copy: bool = True) -> "httpx.Response":
+        """GET that revalidates against the stored ETag for this URL
+
+        A 304 means the copy already in storage is current. Validators are
+        kept one per path, and only offered when `have_copy` says the
+        local copy they vouch for exists.
+        """
+        query = urlencode(sorted((params or {}).items()))
+        validator = (self.storage.get_meta("validators") or {}).get(path)
+        headers = {}
+        if have_copy and validator and validator[0] == query:
+            headers["If-None-Match"] = validator[1]
+        return await self._request("GET", path, params=params, headers=headers)
+    
+    def _remember_validator(self, path: str, params: Dict, response: "httpx.Response"):
+        """Store a response's ETag once its body has been applied to storage"""
+        validators = self.storage.get_meta("validators") or {}
+        etag = response.headers.get("ETag")
+        entry = [urlencode(sorted((params or {}).items())), etag] if etag else None
+        if validators.get(path) != entry:
+            validators = {k: v for k, v in validators.items() if k != path}
+            if entry:
+                validators[path] = entry
+            self.storage.set_meta("validators", validators)
     
     async def check_connection(self) -> bool:
         try:
-            response = await self.client.get(f"{self.base_url}/api/seed", timeout=5.0)
-            self.is_online = response.status_code < 500
-            return self.is_online
+            response = await self._request("GET", "/api/health", timeout=5.0)
+            self._set_online(response.status_code < 500)
         except:
-            self.is_online = False
-            return False
+            pass
+        return self.is_online
     
     async def login(self, username: str, password: str) -> Dict:
         if not self.is_online:
             return {"error": "You are offline. Please connect to the internet to login."}
         
         try:
-            response = await self.client.post(
-                f"{self.base_url}/api/auth/login",
+            response = await self._request(
+                "POST", "/api/auth/login",
                 json={"username": username, "password": password}
             )
             data = response.json()
@@ -168,8 +1325,8 @@ class APIClient:
             return {"error": "You are offline. Please connect to the internet to signup."}
         
         try:
-            response = await self.client.post(
-                f"{self.base_url}/api/auth/signup",
+            response = await self._request(
+                "POST", "/api/auth/signup",
                 json={"name": name, "username": username, "password": password, "image": image}
             )
             data = response.json()
@@ -180,6 +1337,9 @@ class APIClient:
             return {"error": str(e)}
     
     async def get_me(self) -> Dict:
+        return await self._coalesced("me", self._fetch_me)
+    
+    async def _fetch_me(self) -> Dict:
         if not self.is_online:
             user = self.storage.get_user()
             if user:
@@ -187,10 +1347,14 @@ class APIClient:
             return {"error": "Not authenticated"}
         
         try:
-            response = await self.client.get(f"{self.base_url}/api/auth/me")
+            user = self.storage.get_user()
+            response = await self._conditional_get("/api/auth/me", have_copy=bool(user))
+            if response.status_code == 304:
+                return {"user": user}
             data = response.json()
             if response.status_code == 200 and data.get("user"):
                 self.storage.set_user(data["user"])
+                self._remember_validator("/api/auth/me", None, response)
             return data
         except:
             user = self.storage.get_user()
@@ -199,22 +1363,124 @@ class APIClient:
             return {"error": "Not authenticated"}
     
     async def get_notes(self, author_id: str) -> List[Dict]:
+        # Callers own the list they get back, so a shared result is copied
+        return list(await self._coalesced(f"notes:{author_id}", lambda: self._fetch_notes(author_id)))
+    
+    async def _fetch_notes(self, author_id: str) -> List[Dict]:
         if not self.is_online:
             return self.storage.get_notes()
         
+        cursor = self.storage.get_meta("notes_cursor") or {}
         try:
-            response = await self.client.get(f"{self.base_url}/api/notes?authorId={author_id}")
+            if cursor.get("authorId") == author_id and cursor.get("updatedAt"):
+                return await self._get_note_changes(author_id, cursor["updatedAt"])
+            
+            params = self._list_params(author_id)
+            response = await self._conditional_get("/api/notes", params)
+            if response.status_code == 304:
+                return self.storage.get_notes()
             data = response.json()
             if response.status_code == 200:
-                self.storage.set_online_notes(data.get("notes", []))
-                return data.get("notes", [])
+                notes = data.get("notes", [])
+                self.storage.set_online_notes(notes)
+                self._advance_cursor(author_id, notes)
+                self._remember_validator("/api/notes", params, response)
+                return notes
             return []
         except:
             return self.storage.get_notes()
     
+    async def _get_note_changes(self, author_id: str, since: str) -> List[Dict]:
+        """Fetch only notes changed since the cursor and merge them into storage"""
+        params = {**self._list_params(author_id), "updatedSince": since}
+        response = await self._conditional_get("/api/notes", params)
+        if response.status_code != 200:
+            # 304: nothing changed since the last identical delta
+            return self.storage.get_notes()
+        
+        data = response.json()
+        notes = data.get("notes", [])
+        if "ids" not in data:
+            # Server without delta support sent the full list
+            self.storage.set_online_notes(notes)
+            self._advance_cursor(author_id, notes)
+            self._remember_validator("/api/notes", params, response)
+            return notes
+        
+        # Locally deleted notes stay deleted until the server stops listing them
+        tombstones = set(self.storage.get_meta("tombstones") or [])
+        live_ids = data["ids"]
+        self.storage.merge_online_notes([n for n in notes if n["id"] not in tombstones], live_ids)
+        if tombstones:
+            remaining = tombstones.intersection(live_ids)
+            if remaining != tombstones:
+                self.storage.set_meta("tombstones", sorted(remaining))
+        
+        self._advance_cursor(author_id, notes)
+        self._remember_validator("/api/notes", params, response)
+        return self.storage.get_notes()
+    
+    def _list_params(self, author_id: str) -> Dict:
+        params = {"authorId": author_id}
+        if self.summary_list:
+            params["fields"] = "summary"
+        return params
+    
+    async def get_note_content(self, note: Dict, lane: str = "interactive") -> Optional[str]:
+        """Return a note's body, from the note itself, the LRU cache or the server
+
+        Returns None when the body can't be had right now, e.g. offline.
+        """
+        if "content" in note:
+            return note["content"]
+        
+        version = note.get("updatedAt", "")
+        content = self.note_cache.get(note["id"], version)
+        if content is not None:
+            return content
+        
+        if self.is_online and not note["id"].startswith("offline-"):
+            try:
+                response = await self._request("GET", f"/api/notes/{note['id']}", lane=lane)
+                if response.status_code == 200:
+                    full = response.json().get("note", {})
+                    content = full.get("content", "")
+                    self.note_cache.put(note["id"], full.get("updatedAt", version), content)
+                    return content
+            except:
+                pass
+        return None
+    
+    def remember_opened(self, note_id: str):
+        """Track recently opened notes so their bodies can be prefetched"""
+        recent = self.storage.get_meta("recent_notes") or []
+        if recent[:1] != [note_id]:
+            recent = [note_id] + [i for i in recent if i != note_id]
+            self.storage.set_meta("recent_notes", recent[:RECENT_NOTES_PREFETCH])
+    
+    async def prefetch_recent(self):
+        """Warm the note cache with the bodies of the most recently opened notes"""
+        recent = set(self.storage.get_meta("recent_notes") or [])
+        pending = [n for n in self.storage.get_notes() if n["id"] in recent and "content" not in n]
+        await asyncio.gather(*(self.get_note_content(n, lane="background") for n in pending))
+    
+    def _advance_cursor(self, author_id: str, notes: List[Dict]):
+        """Move the updatedAt high-water mark forward past the given notes"""
+        cursor = self.storage.get_meta("notes_cursor") or {}
+        current = cursor.get("updatedAt", "") if cursor.get("authorId") == author_id else ""
+        latest = max([current] + [n.get("updatedAt", "") for n in notes])
+        if latest and (latest != current or cursor.get("authorId") != author_id):
+            self.storage.set_meta("notes_cursor", {"authorId": author_id, "updatedAt": latest})
+    
+    def _add_tombstone(self, note_id: str):
+        tombstones = self.storage.get_meta("tombstones") or []
+        if note_id not in tombstones:
+            self.storage.set_meta("tombstones", tombstones + [note_id])
+    
     async def create_note(self, title: str, content: str, author_id: str) -> Dict:
+        """Create the note locally and return it at once; the server copy follows through the sync queue"""
         note = {
-            "id": f"offline-{int(datetime.now().timestamp())}",
+            "id": f"offline-{uuid.uuid4().hex}",
             "title": title,
             "content": content,
             "authorId": author_id,
@@ -225,62 +1491,264 @@ class APIClient:
             "offline": True
         }
         
-        if not self.is_online:
-            self.storage.save_note(note)
-            self.storage.add_to_sync_queue("create", note)
-            return {"note": note}
+        self.storage.save_note(note)
+        # Its own copy, so later edits to the saved note don't grow the queued create
+        self.storage.add_to_sync_queue("create", dict(note))
+        self.request_sync()
+        return {"note": note}
+    
+    def resolve_id(self, note_id: str) -> str:
+        """Map an offline id to the id the server assigned it, once known"""
+        if not note_id.startswith("offline-"):
+            return note_id
+        return self._id_map.get(note_id, note_id)
+    
+    def forget_id(self, offline_id: str):
+        """Drop an offline id's mapping once nothing queued refers to it
+
+        Only kept in memory: reconciling moves everything stored over to
+        the server id, so just callers still holding the old id need it.
+        """
+        if not any(i["data"]["id"] == offline_id for i in self.storage.get_sync_queue()):
+            self._id_map.pop(offline_id, None)
+    
+    def _reconcile_created(self, item: Dict, server_note: Dict):
+        """Move a note created offline, and everything queued against it, to its server id"""
+        offline_id = item["data"]["id"]
+        server_id = server_note["id"]
+        self._id_map[offline_id] = server_id
+        
+        local = self.storage.get_note(offline_id)
+        if local:
+            note = {k: v for k, v in local.items() if k != "offline"}
+            note["id"] = server_id
+            note["updatedAt"] = server_note.get("updatedAt", note.get("updatedAt"))
+            self.storage.delete_note(offline_id)
+        if "content" in server_note:
+            self.note_cache.put(server_id, server_note.get("updatedAt"), server_note["content"])
+        
+        queue = []
+        for entry in self.storage.get_sync_queue():
+            if entry == item or entry["data"]["id"] != offline_id:
+                continue
+            self._sync_again = True
+            if entry["action"] == "create":
+                # Edits merged into the create while it was in flight go up as an update
+                fields = {k: v for k, v in entry["data"].items()
+                          if k in ("title", "content", "localContent", "isLocked", "password")}
+                queue.append({**entry, "action": "update", "data": {"id": server_id, "data": fields}})
+            else:
+                queue.append({**entry, "data": {**entry["data"], "id": server_id}})
+        
+        tombstones = self.storage.get_meta("tombstones") or []
+        if offline_id in tombstones:
+            # Deleted locally before the server answered
+            self.storage.set_meta("tombstones", [t for t in tombstones if t != offline_id] + [server_id])
+            merge_sync_item(queue, {
+                "action": "delete",
+                "data": {"id": server_id},
+                "timestamp": datetime.now().isoformat()
+            })
+            self._sync_again = True
+        self.storage.set_note_queue(offline_id, [])
+        if queue:
+            self.storage.set_note_queue(server_id, queue)
+        if local:
+            # Edits made while the create was in flight keep the note dirty
+            if queue:
+                self.storage.save_note(note)
+            else:
+                self.storage.mark_synced(note)
         
-        try:
-            response = await self.client.post(
-                f"{self.base_url}/api/notes",
-                json={"title": title, "content": content, "authorId": author_id}
-            )
-            data = response.json()
-            if response.status_code == 200:
-                self.storage.save_note(data.get("note", {}))
-            return data
-        except:
+        # The listener forgets the offline id once it no longer uses it
+        if self.on_note_id_changed:
+            self.on_note_id_changed(offline_id, server_id)
+        else:
+            self.forget_id(offline_id)
+    
+    def queue_offline_update(self, note_id: str, data: Dict) -> Optional[Dict]:
+        """Apply an update to the local copy and queue it for sync"""
+        note = self.storage.get_note(note_id)
+        if note:
+            if "content" not in note and "content" not in data:
+                cached = self.note_cache.get(note_id, note.get("updatedAt", ""))
+                if cached is not None:
+                    note["content"] = cached
+            self._remember_edit_base(note)
+            note.update(data)
+            note["updatedAt"] = datetime.now().isoformat()
+            note["offline"] = True
             self.storage.save_note(note)
-            self.storage.add_to_sync_queue("create", note)
-            return {"note": note}
+            # The saved note already holds the content, so the queue only marks it
+            if "content" in data:
+                data = {**data, "localContent": True}
+                del data["content"]
+            self.storage.add_to_sync_queue("update", {"id": note_id, "data": data})
+        return note
+    
+    def _remember_edit_base(self, note: Dict):
+        """Keep the server version a note's offline edits start from, to merge against on replay"""
+        if note["id"].startswith("offline-") or self.storage.get_edit_base(note["id"]):
+            return
+        # The last acknowledged body is the most reliable base; the stored copy may lag behind it
+        version, content = self.note_cache.peek(note["id"]) or (note.get("updatedAt"), note.get("content"))
+        self.storage.set_edit_base(note["id"], {"updatedAt": version, "title": note.get("title"), "content": content})
+    
+    def track_base(self, note: Dict):
+        """Remember an opened note's server content as the base for patches"""
+        if "content" in note and not note["id"].startswith("offline-") and not self.note_cache.peek(note["id"]):
+            self.note_cache.put(note["id"], note.get("updatedAt", ""), note["content"])
+    
+    async def _send_update(self, note_id: str, data: Dict, lane: str = "interactive") -> tuple:
+        """PUT an update, sending content as a patch against the last acknowledged version when possible"""
+        payload = data
+        base = self.note_cache.peek(note_id)
+        if "content" in data and base:
+            patch = make_text_patch(base[1], data["content"])
+            if len(patch["text"]) < len(data["content"]):
+                payload = {k: v for k, v in data.items() if k != "content"}
+                payload["contentPatch"] = patch
+        
+        response = await self._request("PUT", f"/api/notes/{note_id}", lane=lane, json=payload)
+        if response.status_code == 409 and payload is not data:
+            # Server copy moved on; fall back to a full upload
+            response = await self._request("PUT", f"/api/notes/{note_id}", lane=lane, json=data)
+        
+        result = response.json()
+        if response.status_code < 400:
+            note = result.get("note") or {}
+            content = data.get("content", note.get("content"))
+            if content is not None and note.get("updatedAt"):
+                self.note_cache.put(note_id, note["updatedAt"], content)
+        return response.status_code, result
     
     async def update_note(self, note_id: str, data: Dict) -> Dict:
-        if not self.is_online:
-            notes = self.storage.get_notes()
-            note = next((n for n in notes if n["id"] == note_id), None)
-            if note:
-                note.update(data)
-                note["updatedAt"] = datetime.now().isoformat()
-                note["offline"] = True
-                self.storage.save_note(note)
-                self.storage.add_to_sync_queue("update", {"id": note_id, "data": data})
-            return {"note": note}
+        note_id = self.resolve_id(note_id)
+        # A note whose create has not reached the server yet is edited through the queue
+        if not self.is_online or note_id.startswith("offline-"):
+            return {"note": self.queue_offline_update(note_id, data)}
         
         try:
-            response = await self.client.put(f"{self.base_url}/api/notes/{note_id}", json=data)
-            return response.json()
+            status, result = await self._send_update(note_id, data)
+            if status >= 400:
+                return {"error": result.get("error", "Failed to update note"), "status": status}
+            return result
         except:
+            # Lost the server mid-request: keep the edit for sync instead of failing
+            if not self.is_online:
+                return {"note": self.queue_offline_update(note_id, data)}
             return {"error": "Failed to update note"}
     
     async def delete_note(self, note_id: str) -> Dict:
-        if not self.is_online:
-            self.storage.delete_note(note_id)
-            self.storage.add_to_sync_queue("delete", {"id": note_id})
-            return {"success": True}
+        note_id = self.resolve_id(note_id)
+        # Tombstoned only once the delete is done or queued; a refused delete leaves the note listed
+        if self.is_online and not note_id.startswith("offline-"):
+            try:
+                response = await self._request("DELETE", f"/api/notes/{note_id}")
+                if response.status_code < 400:
+                    self._add_tombstone(note_id)
+                    self.storage.delete_note(note_id)
+                    self.note_cache.discard(note_id)
+                return response.json()
+            except:
+                if self.is_online:
+                    return {"error": "Failed to delete note"}
+        
+        self._add_tombstone(note_id)
+        self.storage.delete_note(note_id)
+        self.storage.add_to_sync_queue("delete", {"id": note_id})
+        return {"success": True}
+    
+    async def subscribe_changes(self, user_id: str) -> bool:
+        """Open the push channel for this user's note changes
+
+        Events are applied to storage and passed on to `on_note_event`.
+        Needs python-socketio; without it, or without the service, changes
+        still arrive through get_notes.
+        """
+        if self._events and self._events_user == user_id:
+            return True
+        await self.unsubscribe_changes()
+        try:
+            import socketio
+        except ImportError:
+            return False
+        
+        events = socketio.AsyncClient()
+        connected_before = False
+        
+        @events.event
+        async def connect():
+            nonlocal connected_before
+            await events.emit("subscribe", {"userId": user_id})
+            # Changes made while the socket was down only show up in a reload
+            if connected_before and self.on_note_event:
+                self.on_note_event("resync", None)
+            connected_before = True
+        
+        @events.on("note-event")
+        async def on_note_event(event):
+            await self._apply_note_event(event)
         
         try:
-            response = await self.client.delete(f"{self.base_url}/api/notes/{note_id}")
-            return response.json()
-        except:
-            return {"error": "Failed to delete note"}
+            await events.connect(EVENTS_URL, socketio_path="/", transports=["websocket"])
+        except Exception as e:
+            print(f"Failed to subscribe to note changes: {e}")
+            return False
+        self._events = events
+        self._events_user = user_id
+        return True
+    
+    async def unsubscribe_changes(self):
+        events, self._events = self._events, None
+        if events:
+            await events.disconnect()
+    
+    async def _apply_note_event(self, event: Dict):
+        """Apply one pushed change to storage, then tell the UI
+
+        Upserts carry only a summary. Unless the list is kept as summaries,
+        the body is fetched first; if that fails the stored copy is left
+        alone for the next get_notes to bring up to date.
+        """
+        if event.get("type") == "delete":
+            note_id = event["id"]
+            if not self.storage.get_note(note_id):
+                return
+            self.storage.delete_note(note_id)
+            self.note_cache.discard(note_id)
+        elif event.get("type") == "upsert":
+            note = event["note"]
+            note_id = note["id"]
+            current = self.storage.get_note(note_id)
+            # Our own writes echo back; local edits that are newer win anyway
+            if current and current.get("updatedAt", "") >= note.get("updatedAt", ""):
+                return
+            content = self.note_cache.get(note_id, note.get("updatedAt", ""))
+            if content is None and not self.summary_list:
+                content = await self.get_note_content(note, lane="background")
+                if content is None:
+                    return
+                current = self.storage.get_note(note_id)
+                if current and current.get("updatedAt", "") >= note.get("updatedAt", ""):
+                    return
+            if content is not None:
+                note = {**note, "content": content}
+            self.storage.merge_online_notes([note])
+        else:
+            return
+        
+        self._invalidate_responses()
+        if self.on_note_event:
+            self.on_note_event(event["type"], note_id)
     
     async def share_note(self, note_id: str, username: str) -> Dict:
         if not self.is_online:
             return {"error": "offline"}
         
         try:
-            response = await self.client.post(
-                f"{self.base_url}/api/notes/{note_id}/share",
+            response = await self._request(
+                "POST", f"/api/notes/{note_id}/share",
                 json={"username": username}
             )
             return response.json()
@@ -295,44 +1763,577 @@ class APIClient:
             return {"user": user}
         
         try:
-            response = await self.client.put(
-                f"{self.base_url}/api/user/settings/{user_id}",
+            response = await self._request(
+                "PUT", f"/api/user/settings/{user_id}",
                 json=data
             )
-            data = response.json()
+            result = response.json()
             if response.status_code == 200:
-                self.storage.set_user(data.get("user"))
-            return data
+                self.storage.set_user(result.get("user"))
+            return result
         except:
+            if not self.is_online:
+                return await self.update_settings(user_id, data)
             return {"error": "Failed to update settings"}
     
+    def request_sync(self):
+        """Replay the queue in the background, or have the running replay take another pass"""
+        if self._sync_task and not self._sync_task.done():
+            self._sync_again = True
+        elif self.is_online:
+            self._sync_task = asyncio.get_running_loop().create_task(self.sync_offline_changes())
+    
     async def sync_offline_changes(self):
         if not self.is_online:
             return
+        # One replay at a time; a request made meanwhile runs another pass afterwards
+        if self._syncing:
+            self._sync_again = True
+            return
         
+        self._syncing = True
+        try:
+            self._sync_again = True
+            while self._sync_again and self.is_online:
+                self._sync_again = False
+                await self._sync_queue_once()
+        finally:
+            self._syncing = False
+    
+    async def _sync_queue_once(self):
         queue = self.storage.get_sync_queue()
         if not queue:
             return
         
-        for item in queue:
+        compacted = compact_sync_queue(queue)
+        if len(compacted) < len(queue):
+            self.storage.set_sync_queue(compacted)
+        
+        # Operations on the same note stay in order; different notes replay concurrently
+        chains: Dict[str, List[Dict]] = {}
+        for item in compacted:
+            chains.setdefault(item["data"]["id"], []).append(item)
+        
+        semaphore = asyncio.Semaphore(self.sync_concurrency)
+        synced = []
+        
+        async def replay_chain(chain: List[Dict]):
+            async with semaphore:
+                for item in chain:
+                    try:
+                        ok = await self._replay_item(item)
+                    except Exception as e:
+                        print(f"Sync error: {e}")
+                        ok = False
+                    if not ok:
+                        return
+                    synced.append(item)
+        
+        await asyncio.gather(*(replay_chain(chain) for chain in chains.values()))
+        
+        # Failed items, and items merged or queued during replay, stay for the next attempt
+        done = {i["data"]["id"] for i in synced}
+        queue = self.storage.get_sync_queue()
+        for note_id in done:
+            left = [i for i in queue if i["data"]["id"] == note_id and i not in synced]
+            self.storage.set_note_queue(note_id, left)
+    
+    def _with_local_content(self, note_id: str, data: Dict) -> Dict:
+        """Swap a queued localContent marker for the note's saved content"""
+        if not data.get("localContent"):
+            return data
+        data = {k: v for k, v in data.items() if k != "localContent"}
+        note = self.storage.get_note(note_id)
+        if note and "content" in note:
+            data["content"] = note["content"]
+        return data
+    
+    async def _replay_item(self, item: Dict) -> bool:
+        """Send a single queued operation, returning whether the server accepted it"""
+        if item["action"] == "create":
+            note_data = dict(self._with_local_content(item["data"]["id"], item["data"]))
+            if note_data["id"].startswith("offline-"):
+                del note_data["id"]
+            note_data.pop("offline", None)
+            response = await self._request("POST", "/api/notes", lane="background", json=note_data)
+            if response.status_code >= 400:
+                return False
+            if item["data"]["id"].startswith("offline-"):
+                self._reconcile_created(item, response.json().get("note", {}))
+            return True
+        elif item["action"] == "update":
+            return await self._replay_update(item)
+        elif item["action"] == "delete":
+            response = await self._request("DELETE", f"/api/notes/{self.resolve_id(item['data']['id'])}", lane="background")
+            # Already gone on the server counts as done
+            return response.status_code < 400 or response.status_code == 404
+        else:
+            return True
+    
+    async def _replay_update(self, item: Dict) -> bool:
+        """Send a queued update against the version it was made on, merging if the server moved on"""
+        note_id = self.resolve_id(item["data"]["id"])
+        data = self._with_local_content(note_id, item["data"]["data"])
+        base = self.storage.get_edit_base(note_id)
+        
+        for _ in range(3):
+            payload = {**data, "baseUpdatedAt": base["updatedAt"]} if base and base.get("updatedAt") else data
+            status, result = await self._send_update(note_id, payload, lane="background")
+            if status != 409 or not base or not result.get("note"):
+                break
+            data, base = self._merge_with_server(note_id, data, base, result["note"])
+        if status >= 400:
+            return False
+        
+        # Later edits to this note start from the version just acknowledged
+        note = result.get("note") or {}
+        pending = any(
+            i["data"]["id"] in (note_id, item["data"]["id"]) and i != item
+            for i in self.storage.get_sync_queue()
+        )
+        if pending:
+            prev = base or {}
+            self.storage.set_edit_base(note_id, {
+                "updatedAt": note.get("updatedAt"),
+                "title": data.get("title", prev.get("title")),
+                "content": data.get("content", prev.get("content")),
+            })
+        elif base:
+            self.storage.set_edit_base(note_id, None)
+        
+        local = self.storage.get_note(note_id)
+        if local and note.get("updatedAt"):
+            local = {k: v for k, v in local.items() if k != "offline"}
+            local["updatedAt"] = note["updatedAt"]
+            if pending:
+                self.storage.save_note(local)
+            else:
+                self.storage.mark_synced(local)
+        return True
+    
+    def _merge_with_server(self, note_id: str, data: Dict, base: Dict, remote: Dict) -> tuple:
+        """Three-way merge a rejected offline edit with the server copy; returns (data, new base)"""
+        merged = dict(data)
+        conflicted = False
+        for field in ("title", "content"):
+            if field not in data or base.get(field) is None:
+                continue
+            ours, theirs = data[field], remote.get(field, "")
+            if field == "content":
+                merged[field], clash = merge_text(base[field], ours, theirs)
+            elif ours == base[field]:
+                merged[field], clash = theirs, False
+            else:
+                # A title is one value: a local rename wins, flagged if the server renamed too
+                merged[field], clash = ours, theirs not in (ours, base[field])
+            conflicted = conflicted or clash
+        
+        local = self.storage.get_note(note_id) or {}
+        self.storage.save_note({**remote, **local, **merged, "id": note_id})
+        if "content" in remote:
+            # The merged body goes up as a patch against the server copy
+            self.note_cache.put(note_id, remote.get("updatedAt"), remote["content"])
+        # The conflict markers are in the note itself; the listener just points the user at it
+        if conflicted and self.on_sync_conflict:
+            self.on_sync_conflict(note_id)
+        return merged, {"updatedAt": remote.get("updatedAt"), "title": remote.get("title"), "content": remote.get("content")}
+
+
+# ============================================
+# NOTE RECORD
+# ============================================
+
+_MISSING = object()
+
+
+class Note:
+    """A note as the UI holds it
+
+    Known fields live in slots and anything else in `extra`, so a note
+    still reads and writes like the dict it was built from. Derived
+    strings for search and the notes list are computed once and dropped
+    whenever the title or body changes.
+    """
+    
+    FIELDS = ("id", "title", "content", "preview", "authorId", "isLocked", "password", "createdAt", "updatedAt", "offline")
+    DERIVED = ("_title_lower", "_card_title", "_list_preview")
+    TEXT_FIELDS = frozenset(("title", "content", "preview"))
+    __slots__ = FIELDS + DERIVED + ("extra",)
+    
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, _MISSING)
+        self.extra = None
+        for key, value in fields.items():
+            self[key] = value
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Note":
+        note = cls.__new__(cls)
+        for name in cls.__slots__:
+            object.__setattr__(note, name, data.get(name, _MISSING) if name in cls.FIELDS else _MISSING)
+        note.extra = {k: v for k, v in data.items() if k not in cls.FIELDS} or None
+        return note
+    
+    def to_dict(self) -> Dict:
+        data = {}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not _MISSING:
+                data[name] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+    
+    def _invalidate(self):
+        for name in self.DERIVED:
+            object.__setattr__(self, name, _MISSING)
+    
+    def __getitem__(self, key: str):
+        value = getattr(self, key, _MISSING) if key in self.FIELDS else (self.extra or {}).get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    
+    def __setitem__(self, key: str, value):
+        if key in self.FIELDS:
+            object.__setattr__(self, key, value)
+            if key in self.TEXT_FIELDS:
+                self._invalidate()
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+    
+    def __contains__(self, key: str) -> bool:
+        if key in self.FIELDS:
+            return getattr(self, key) is not _MISSING
+        return bool(self.extra) and key in self.extra
+    
+    def __iter__(self):
+        return iter(self.keys())
+    
+    def __len__(self) -> int:
+        return len(self.keys())
+    
+    def __repr__(self) -> str:
+        return f"Note({self.to_dict()!r})"
+    
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def pop(self, key: str, *default):
+        try:
+            value = self[key]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        if key in self.FIELDS:
+            self[key] = _MISSING
+        else:
+            del self.extra[key]
+        return value
+    
+    def update(self, data: Dict):
+        for key, value in data.items():
+            self[key] = value
+    
+    def keys(self) -> List[str]:
+        return list(self.to_dict())
+    
+    def items(self) -> List[tuple]:
+        return list(self.to_dict().items())
+    
+    def body(self) -> str:
+        """Content if loaded, otherwise the summary preview"""
+        if self.content is not _MISSING:
+            return self.content
+        return "" if self.preview is _MISSING else self.preview
+    
+    @property
+    def title_lower(self) -> str:
+        if self._title_lower is _MISSING:
+            self._title_lower = self.get("title", "").lower()
+        return self._title_lower
+    
+    @property
+    def card_title(self) -> str:
+        if self._card_title is _MISSING:
+            self._card_title = self.get("title", "Untitled")[:25]
+        return self._card_title
+    
+    @property
+    def list_preview(self) -> str:
+        if self._list_preview is _MISSING:
+            self._list_preview = self.body()[:40] or "No content"
+        return self._list_preview
+
+
+# ============================================
+# SEARCH INDEX
+# ============================================
+
+class SearchIndex:
+    """Token and prefix inverted index over note titles and contents
+
+    Every query word matches note words it is a prefix of. Results are
+    ranked with title matches first, then by recency. Edited notes are
+    only re-tokenized on the next search.
+    """
+    
+    TOKEN_RE = re.compile(r"\w+")
+    
+    def __init__(self):
+        self._title: Dict[str, set] = {}
+        self._content: Dict[str, set] = {}
+        self._vocab: List[str] = []
+        self._tokens: Dict[str, tuple] = {}
+        self._notes: Dict[str, Note] = {}
+        self._stale: Dict[str, Note] = {}
+    
+    def rebuild(self, notes: List[Note]):
+        self.__init__()
+        for note in notes:
+            self.update(note)
+    
+    def update(self, note: Note):
+        """Mark a note as added or changed"""
+        self._notes[note["id"]] = note
+        self._stale[note["id"]] = note
+    
+    def remove(self, note_id: str):
+        self._unindex(note_id)
+        self._notes.pop(note_id, None)
+        self._stale.pop(note_id, None)
+    
+    def _tokenize(self, text: str) -> set:
+        return set(self.TOKEN_RE.findall(text.lower()))
+    
+    def _index(self, note: Note):
+        self._unindex(note["id"])
+        title = set(self.TOKEN_RE.findall(note.title_lower))
+        content = self._tokenize(note.body())
+        self._tokens[note["id"]] = (title, content)
+        for postings, tokens in ((self._title, title), (self._content, content)):
+            for token in tokens:
+                if token not in self._title and token not in self._content:
+                    insort(self._vocab, token)
+                postings.setdefault(token, set()).add(note["id"])
+    
+    def _unindex(self, note_id: str):
+        title, content = self._tokens.pop(note_id, ((), ()))
+        for postings, tokens in ((self._title, title), (self._content, content)):
+            for token in tokens:
+                ids = postings.get(token)
+                if ids is None:
+                    continue
+                ids.discard(note_id)
+                if not ids:
+                    del postings[token]
+                    if token not in self._title and token not in self._content:
+                        del self._vocab[bisect_left(self._vocab, token)]
+    
+    def search(self, query: str) -> List[Note]:
+        for note in self._stale.values():
+            self._index(note)
+        self._stale.clear()
+        
+        matches = None
+        title_matches = None
+        for term in self._tokenize(query):
+            term_ids = set()
+            term_title_ids = set()
+            i = bisect_left(self._vocab, term)
+            while i < len(self._vocab) and self._vocab[i].startswith(term):
+                token = self._vocab[i]
+                term_title_ids |= self._title.get(token, set())
+                term_ids |= self._content.get(token, set())
+                i += 1
+            term_ids |= term_title_ids
+            matches = term_ids if matches is None else matches & term_ids
+            title_matches = term_title_ids if title_matches is None else title_matches & term_title_ids
+        
+        if not matches:
+            return []
+        results = [self._notes[i] for i in matches]
+        results.sort(key=lambda n: n.get("updatedAt", n.get("createdAt", "")), reverse=True)
+        results.sort(key=lambda n: n["id"] not in title_matches)
+        return results
+
+
+# ============================================
+# AUTOSAVE
+# ============================================
+
+class Autosaver:
+    """Buffers editor changes per note and saves them in batches
+
+    A note is saved once typing has paused for `idle_delay` seconds, or
+    `max_delay` seconds after its first unsaved edit, whichever is first.
+    Saves that failed in transit or on a server error keep their edits and
+    retry after `max_delay`; edits the server refuses (4xx) are dropped.
+    """
+    
+    def __init__(self, save, idle_delay: float = AUTOSAVE_IDLE_DELAY,
+                 max_delay: float = AUTOSAVE_MAX_DELAY, on_state=None):
+        self._save = save
+        self.idle_delay = idle_delay
+        self.max_delay = max_delay
+        self._on_state = on_state or (lambda state: None)
+        self._pending: Dict[str, Dict] = {}
+        self._deadlines: Dict[str, float] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+    
+    def queue(self, note_id: str, data: Dict):
+        self._pending.setdefault(note_id, {}).update(data)
+        now = time.monotonic()
+        deadline = self._deadlines.setdefault(note_id, now + self.max_delay)
+        self._schedule(note_id, min(self.idle_delay, deadline - now))
+        self._on_state("saving")
+    
+    def discard(self, note_id: str):
+        """Drop unsaved edits, e.g. for a note that is being deleted"""
+        self._cancel(note_id)
+        self._pending.pop(note_id, None)
+        self._deadlines.pop(note_id, None)
+    
+    def rename(self, old_id: str, new_id: str):
+        """Carry unsaved edits over to a note's new id"""
+        data = self._pending.pop(old_id, None)
+        self._cancel(old_id)
+        self._deadlines.pop(old_id, None)
+        if data:
+            self.queue(new_id, data)
+    
+    async def settle(self, note_id: str):
+        """Wait for a save of this note that is already under way"""
+        lock = self._locks.get(note_id)
+        if lock:
+            async with lock:
+                pass
+            self._locks.pop(note_id, None)
+    
+    def drain(self) -> Dict[str, Dict]:
+        """Take all unsaved edits without saving them"""
+        for note_id in list(self._timers):
+            self._cancel(note_id)
+        pending, self._pending = self._pending, {}
+        self._deadlines.clear()
+        return pending
+    
+    async def flush(self, note_id: str = None):
+        """Save buffered edits now, for one note or all of them"""
+        for nid in [note_id] if note_id else list(self._pending):
+            self._cancel(nid)
+            await self._flush_note(nid)
+    
+    def _cancel(self, note_id: str):
+        timer = self._timers.pop(note_id, None)
+        if timer:
+            timer.cancel()
+    
+    def _schedule(self, note_id: str, delay: float):
+        self._cancel(note_id)
+        self._timers[note_id] = asyncio.get_running_loop().create_task(self._save_later(note_id, max(delay, 0)))
+    
+    async def _save_later(self, note_id: str, delay: float):
+        await asyncio.sleep(delay)
+        # Past this point the save must not be cancelled by newer edits
+        self._timers.pop(note_id, None)
+        await self._flush_note(note_id)
+    
+    async def _flush_note(self, note_id: str):
+        async with self._locks.setdefault(note_id, asyncio.Lock()):
+            data = self._pending.pop(note_id, None)
+            self._deadlines.pop(note_id, None)
+            if not data:
+                return
             try:
-                if item["action"] == "create":
-                    note_data = item["data"].copy()
-                    if note_data["id"].startswith("offline-"):
-                        del note_data["id"]
-                    del note_data["offline"]
-                    await self.client.post(f"{self.base_url}/api/notes", json=note_data)
-                elif item["action"] == "update":
-                    await self.client.put(
-                        f"{self.base_url}/api/notes/{item['data']['id']}",
-                        json=item["data"]["data"]
-                    )
-                elif item["action"] == "delete":
-                    await self.client.delete(f"{self.base_url}/api/notes/{item['data']['id']}")
+                result = await self._save(note_id, data)
             except Exception as e:
-                print(f"Sync error: {e}")
-        
-        self.storage.clear_sync_queue()
+                result = {"error": str(e)}
+        
+        if result.get("error") and 400 <= result.get("status", 500) < 500:
+            # Refused, e.g. deleted elsewhere or no longer shared: retrying can't help
+            self._on_state("rejected")
+        elif result.get("error"):
+            # Newer edits made during the save win over the failed ones
+            self._pending[note_id] = {**data, **self._pending.get(note_id, {})}
+            self._deadlines.setdefault(note_id, time.monotonic() + self.max_delay)
+            if note_id not in self._timers:
+                self._schedule(note_id, self.max_delay)
+            self._on_state("error")
+        elif not self._pending:
+            self._on_state("saved")
+
+
+# ============================================
+# UI UPDATE SCHEDULER
+# ============================================
+
+class UpdateScheduler:
+    """Coalesces page updates into at most one flush per frame
+
+    `request()` marks the whole page dirty, `request(control)` just that
+    control. Inside `batch()` nothing is flushed until the outermost
+    batch ends.
+    """
+    
+    def __init__(self, page: ft.Page, interval: float = UI_FRAME_INTERVAL):
+        self.page = page
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._full = False
+        self._controls: List[ft.Control] = []
+        self._scheduled = False
+        self._batch_depth = 0
+    
+    def request(self, control: ft.Control = None):
+        with self._lock:
+            if control is None:
+                self._full = True
+            elif control not in self._controls:
+                self._controls.append(control)
+            if self._batch_depth or self._scheduled:
+                return
+            self._scheduled = True
+        self.page.run_task(self._flush_later)
+    
+    async def _flush_later(self):
+        await asyncio.sleep(self.interval)
+        with self._lock:
+            self._scheduled = False
+        self.flush()
+    
+    def flush(self):
+        with self._lock:
+            full, controls = self._full, self._controls
+            self._full, self._controls = False, []
+        if full:
+            self.page.update()
+        elif controls:
+            self.page.update(*controls)
+    
+    @contextmanager
+    def batch(self):
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                done = self._batch_depth == 0 and not self._scheduled
+            if done:
+                self.flush()
 
 
 # ============================================
@@ -344,8 +2345,13 @@ class NoteXApp:
     
     def __init__(self, page: ft.Page):
         self.page = page
-        self.storage = OfflineStorage()
-        self.api = APIClient(self.storage)
+        self.ui = UpdateScheduler(page)
+        self.storage = SQLiteOfflineStorage() if STORAGE_BACKEND == "sqlite" else OfflineStorage()
+        self.api = APIClient(self.storage, summary_list=SUMMARY_NOTE_LIST)
+        self.autosave = Autosaver(self.api.update_note, on_state=self._show_save_state)
+        self.api.on_note_id_changed = self._handle_note_id_changed
+        self.api.on_note_event = self._handle_note_event
+        self.api.on_sync_conflict = self._handle_sync_conflict
         
         # App state
         self.user = self.storage.get_user()
@@ -353,6 +2359,13 @@ class NoteXApp:
         self.selected_note = None
         self.is_online = True
         self.search_query = ""
+        self.search_index = SearchIndex()
+        self._note_cards: Dict[str, Dict] = {}
+        self._card_pool: List[Dict] = []
+        self._visible_notes: List[Dict] = []
+        self._scroll_offset = 0.0
+        self._viewport_height = 0.0
+        self._window = (0, 0)
         self.showing_signup = False
         
         # Setup page
@@ -361,6 +2374,10 @@ class NoteXApp:
         # Build UI
         self._build_ui()
         
+        # Flush pending offline writes when the window goes away
+        self.page.on_disconnect = self._handle_disconnect
+        self.page.on_connect = self._handle_connect
+        
         # Initialize
         self.page.run_task(self._initialize)
     
@@ -669,10 +2686,13 @@ class NoteXApp:
             on_click=self._create_note,
         )
         
+        # Cards carry their own gap so virtualized rows have a fixed pitch
         self.notes_list = ft.ListView(
             expand=True,
-            spacing=8,
+            spacing=0,
             padding=ft.padding.all(12),
+            on_scroll=self._handle_notes_scroll,
+            on_scroll_interval=50,
         )
         
         self.sidebar = ft.Container(
@@ -710,6 +2730,7 @@ class NoteXApp:
             text_style=ft.TextStyle(size=28, weight=ft.FontWeight.BOLD, color=COLORS["text"]),
             expand=True,
             on_change=self._update_note_title,
+            on_blur=self._flush_edits,
         )
         
         self.note_content = ft.TextField(
@@ -720,6 +2741,7 @@ class NoteXApp:
             expand=True,
             text_style=ft.TextStyle(size=16, color=COLORS["text"]),
             on_change=self._update_note_content,
+            on_blur=self._flush_edits,
         )
         
         self.lock_btn = ft.IconButton(
@@ -736,6 +2758,8 @@ class NoteXApp:
             on_click=self._show_share_dialog,
         )
         
+        self.save_status = ft.Text("", size=12, color=COLORS["text_secondary"])
+        
         self.delete_btn = ft.IconButton(
             icon=ft.icons.DELETE_ROUNDED,
             icon_color=COLORS["error"],
@@ -749,6 +2773,7 @@ class NoteXApp:
                     self.note_title,
                     ft.Row(
                         controls=[
+                            self.save_status,
                             self.lock_btn,
                             self.share_btn,
                             self.delete_btn,
@@ -768,6 +2793,14 @@ class NoteXApp:
             expand=True,
         )
         
+        self.editor_view = ft.Column(
+            controls=[
+                self.editor_toolbar,
+                self.editor_content,
+            ],
+            expand=True,
+        )
+        
         # Empty state
         self.empty_state = ft.Column(
             controls=[
@@ -1077,30 +3110,72 @@ class NoteXApp:
     # ============================================
     
     async def _initialize(self):
-        """Initialize app"""
-        # Check connection
+        """Initialize app
+
+        Paints cached notes straight from offline storage, then checks the
+        connection, syncs and reconciles in the background.
+        """
+        if self.user:
+            self.notes = self._note_records(self.storage.get_notes())
+            self.search_index.rebuild(self.notes)
+            self._render_notes()
+            self.ui.flush()
+        self._log_startup("first paint")
+        
+        self.page.run_task(self._connect)
+    
+    async def _connect(self):
+        """Check the connection, then sync and reload notes"""
         self.is_online = await self.api.check_connection()
+        self._log_startup("connection check")
         
         if not self.is_online:
             if not self.user:
                 self._show_offline_overlay()
             else:
                 self._show_offline_indicator()
-                await self._load_notes()
         else:
             await self.api.sync_offline_changes()
             if self.user:
                 await self._load_notes()
+                self.page.run_task(self.api.subscribe_changes, self.user.get("id"))
+            self._log_startup("notes synced")
         
         # Start connection monitor
         self.page.run_task(self._monitor_connection)
     
+    def _log_startup(self, stage: str):
+        if STARTUP_LOG:
+            print(f"[startup] {stage}: {(time.perf_counter() - STARTUP_TIME) * 1000:.0f} ms")
+    
     async def _monitor_connection(self):
-        """Monitor internet connection"""
+        """Monitor internet connection
+
+        Probes the health route on an adaptive interval: rarely while
+        healthy, backing off exponentially while offline. Regular API
+        calls count as probes, and a failed call wakes the monitor early.
+        """
+        delay = MONITOR_HEALTHY_INTERVAL if self.is_online else MONITOR_OFFLINE_MIN_INTERVAL
         while True:
-            await asyncio.sleep(5)
+            try:
+                await asyncio.wait_for(self.api.status_changed.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self.api.status_changed.clear()
+            
             was_online = self.is_online
-            self.is_online = await self.api.check_connection()
+            recently_ok = time.monotonic() - self.api.last_success < MONITOR_HEALTHY_INTERVAL
+            if self.api.is_online and recently_ok:
+                self.is_online = True
+            else:
+                self.is_online = await self.api.check_connection()
+            
+            if self.is_online:
+                delay = MONITOR_HEALTHY_INTERVAL
+            elif was_online:
+                delay = MONITOR_OFFLINE_MIN_INTERVAL
+            else:
+                delay = min(delay * 2, MONITOR_OFFLINE_MAX_INTERVAL)
             
             if was_online and not self.is_online:
                 if self.user:
@@ -1108,11 +3183,18 @@ class NoteXApp:
                 else:
                     self._show_offline_overlay()
             elif not was_online and self.is_online:
-                self._hide_offline_indicator()
-                self._hide_offline_overlay()
+                with self.ui.batch():
+                    self._hide_offline_indicator()
+                    self._hide_offline_overlay()
                 await self.api.sync_offline_changes()
                 if self.user:
                     await self._load_notes()
+                    self.page.run_task(self.api.subscribe_changes, self.user.get("id"))
+                    if self.selected_note and "content" not in self.selected_note:
+                        self.page.run_task(self._load_note_content, self.selected_note)
+            elif self.is_online and self.storage.get_sync_queue():
+                # Left over from a dropped session, or from a replay that failed
+                self.api.request_sync()
     
     # ============================================
     # VIEW MANAGEMENT
@@ -1122,7 +3204,7 @@ class NoteXApp:
         """Show specific view"""
         self.login_view.visible = view == "login"
         self.main_view.visible = view == "main"
-        self.page.update()
+        self.ui.request()
     
     def _toggle_auth_mode(self, signup: bool):
         """Toggle between login and signup"""
@@ -1139,7 +3221,7 @@ class NoteXApp:
         self.signup_button.visible = signup
         self.login_link.visible = signup
         
-        self.page.update()
+        self.ui.request()
     
     # ============================================
     # EVENT HANDLERS
@@ -1163,6 +3245,7 @@ class NoteXApp:
             self.storage.set_user(self.user)
             self._show_view("main")
             await self._load_notes()
+            self.page.run_task(self.api.subscribe_changes, self.user.get("id"))
     
     async def _handle_signup(self, e):
         """Handle signup"""
@@ -1183,106 +3266,247 @@ class NoteXApp:
             self.storage.set_user(self.user)
             self._show_view("main")
             await self._load_notes()
+            self.page.run_task(self.api.subscribe_changes, self.user.get("id"))
     
     async def _handle_logout(self, e):
         """Handle logout"""
+        await self.autosave.flush()
+        await self.api.unsubscribe_changes()
         self.user = None
         self.storage.set_user(None)
+        self.storage.flush()
         self.notes = []
         self.selected_note = None
-        self._show_view("login")
-        self._hide_offline_indicator()
+        with self.ui.batch():
+            self._show_view("login")
+            self._hide_offline_indicator()
     
     async def _load_notes(self):
         """Load notes"""
         if self.user:
-            self.notes = await self.api.get_notes(self.user.get("id"))
+            self.notes = self._note_records(await self.api.get_notes(self.user.get("id")))
+            self.search_index.rebuild(self.notes)
             self._render_notes()
+            if self.api.summary_list and self.api.is_online:
+                self.page.run_task(self.api.prefetch_recent)
+    
+    def _note_records(self, notes: List[Dict]) -> List[Note]:
+        """Wrap loaded notes, keeping the records of notes that haven't changed
+
+        A note whose version matches the one already shown keeps its record,
+        so cached list strings and any unsaved edits in it survive a reload.
+        """
+        shown = {n["id"]: n for n in self.notes}
+        records = []
+        for data in notes:
+            note = shown.get(data["id"])
+            if note is None or note.get("updatedAt") != data.get("updatedAt") or "content" in data and "content" not in note:
+                note = Note.from_dict(data)
+            records.append(note)
+        return records
     
     def _render_notes(self):
-        """Render notes list"""
-        self.notes_list.controls.clear()
-        
+        """Render notes list
+
+        Cards are kept per note id and patched in place, so Flet only
+        receives the cards that changed and any reordering. Long lists
+        are virtualized: a small pool of cards is recycled for the rows
+        in view, between two spacers standing in for the rest.
+        """
         filtered = self.notes
-        if self.search_query:
-            filtered = [
-                n for n in self.notes
-                if self.search_query.lower() in n.get("title", "").lower()
-                or self.search_query.lower() in n.get("content", "").lower()
-            ]
+        if self.search_query.strip():
+            filtered = self.search_index.search(self.search_query)
+        
+        if len(filtered) > VIRTUAL_LIST_THRESHOLD:
+            self._note_cards.clear()
+            self._visible_notes = filtered
+            self._window = (0, 0)
+            self._render_window()
+            return
         
+        self._visible_notes = []
+        self._card_pool.clear()
+        selected_id = self.selected_note.get("id") if self.selected_note else None
+        controls = []
         for note in filtered:
-            is_selected = self.selected_note and self.selected_note.get("id") == note.get("id")
-            is_locked = note.get("isLocked")
-            
-            card = ft.Container(
-                content=ft.Column(
-                    controls=[
-                        ft.Row(
-                            controls=[
-                                ft.Icon(
-                                    ft.icons.LOCK_ROUNDED if is_locked else ft.icons.NOTE_ROUNDED,
-                                    size=18,
-                                    color=COLORS["warning"] if is_locked else COLORS["text_secondary"],
-                                ),
-                                ft.Text(
-                                    note.get("title", "Untitled")[:25],
-                                    size=14,
-                                    weight=ft.FontWeight.W_500,
-                                    color=COLORS["text"],
-                                    overflow=ft.TextOverflow.ELLIPSIS,
-                                    expand=True,
-                                ),
-                            ],
-                        ),
-                        ft.Container(height=4),
-                        ft.Text(
-                            note.get("content", "")[:40] or "No content",
-                            size=12,
-                            color=COLORS["text_secondary"],
-                            overflow=ft.TextOverflow.ELLIPSIS,
-                        ),
-                    ],
-                    spacing=4,
-                ),
-                padding=12,
-                bgcolor=COLORS["primary_light"] if is_selected else COLORS["card"],
-                border_radius=10,
-                border=ft.border.all(1, COLORS["primary"] if is_selected else COLORS["border"]),
-                on_click=lambda e, n=note: self._select_note(n),
-                on_hover=lambda e, c: self._hover_note(e, c),
-                animate=ft.animation.Animation(150, ft.AnimationCurve.EASE_OUT),
-            )
-            self.notes_list.controls.append(card)
+            parts = self._note_cards.get(note["id"])
+            if not parts:
+                parts = self._note_cards[note["id"]] = self._build_note_card()
+            parts["note"] = note
+            self._patch_note_card(parts, note["id"] == selected_id)
+            controls.append(parts["card"])
+        
+        if controls != self.notes_list.controls:
+            self.notes_list.controls = controls
+        
+        # Forget cards of notes that no longer exist
+        if len(self._note_cards) > len(self.notes):
+            live = {n["id"] for n in self.notes}
+            for note_id in [i for i in self._note_cards if i not in live]:
+                del self._note_cards[note_id]
+        
+        self.ui.request()
+    
+    def _render_window(self):
+        """Show the virtualized rows around the current scroll position"""
+        pitch = NOTE_CARD_HEIGHT + NOTE_CARD_GAP
+        viewport = self._viewport_height or self.page.window.height or 800
+        total = len(self._visible_notes)
+        first = max(0, min(int(self._scroll_offset // pitch), total) - VIRTUAL_LIST_OVERSCAN)
+        last = min(total, first + int(viewport // pitch) + 1 + 2 * VIRTUAL_LIST_OVERSCAN)
+        
+        if (first, last) == self._window and self.notes_list.controls:
+            return
+        self._window = (first, last)
+        
+        while len(self._card_pool) < last - first:
+            self._card_pool.append(self._build_note_card())
+        
+        selected_id = self.selected_note.get("id") if self.selected_note else None
+        cards = self._card_pool[:last - first]
+        for parts, note in zip(cards, self._visible_notes[first:last]):
+            parts["note"] = note
+            self._patch_note_card(parts, note["id"] == selected_id)
+        
+        self.notes_list.controls = [
+            ft.Container(height=first * pitch),
+            *[parts["card"] for parts in cards],
+            ft.Container(height=(total - last) * pitch),
+        ]
+        self.ui.request()
+    
+    def _handle_notes_scroll(self, e):
+        """Move the virtualized window as the notes list scrolls"""
+        self._scroll_offset = e.pixels
+        self._viewport_height = e.viewport_dimension or self._viewport_height
+        if self._visible_notes:
+            self._render_window()
+    
+    def _build_note_card(self) -> Dict:
+        """Create the controls for one note card"""
+        icon = ft.Icon(size=18)
+        title = ft.Text(
+            size=14,
+            weight=ft.FontWeight.W_500,
+            color=COLORS["text"],
+            max_lines=1,
+            overflow=ft.TextOverflow.ELLIPSIS,
+            expand=True,
+        )
+        preview = ft.Text(
+            size=12,
+            color=COLORS["text_secondary"],
+            max_lines=1,
+            overflow=ft.TextOverflow.ELLIPSIS,
+        )
+        parts = {"icon": icon, "title": title, "preview": preview, "note": None, "state": None}
+        parts["card"] = ft.Container(
+            content=ft.Column(
+                controls=[
+                    ft.Row(controls=[icon, title]),
+                    ft.Container(height=4),
+                    preview,
+                ],
+                spacing=4,
+            ),
+            height=NOTE_CARD_HEIGHT,
+            margin=ft.margin.only(bottom=NOTE_CARD_GAP),
+            padding=12,
+            border_radius=10,
+            on_click=lambda e: self._select_note(parts["note"]),
+            on_hover=lambda e: self._hover_note(e, parts),
+            animate=ft.animation.Animation(150, ft.AnimationCurve.EASE_OUT),
+        )
+        return parts
+    
+    def _patch_note_card(self, parts: Dict, is_selected: bool) -> bool:
+        """Bring a card in line with its note, returning whether anything changed"""
+        note = parts["note"]
+        is_locked = bool(note.get("isLocked"))
+        title = note.card_title
+        preview = note.list_preview
+        state = (title, preview, is_locked, is_selected)
+        if parts["state"] == state:
+            return False
         
-        self.page.update()
-    
-    def _hover_note(self, e, card):
+        parts["icon"].name = ft.icons.LOCK_ROUNDED if is_locked else ft.icons.NOTE_ROUNDED
+        parts["icon"].color = COLORS["warning"] if is_locked else COLORS["text_secondary"]
+        parts["title"].value = title
+        parts["preview"].value = preview
+        parts["card"].bgcolor = COLORS["primary_light"] if is_selected else COLORS["card"]
+        parts["card"].border = ft.border.all(1, COLORS["primary"] if is_selected else COLORS["border"])
+        parts["state"] = state
+        return True
+    
+    def _cards_for(self, note_id: str) -> List[Dict]:
+        """Cards currently showing a note, keyed or virtualized"""
+        if self._visible_notes:
+            first, last = self._window
+            return [p for p in self._card_pool[:last - first] if p["note"] and p["note"]["id"] == note_id]
+        parts = self._note_cards.get(note_id)
+        return [parts] if parts else []
+    
+    def _refresh_note_card(self, note_id: str):
+        """Patch a single card after its note changed"""
+        is_selected = bool(self.selected_note) and self.selected_note.get("id") == note_id
+        changed = [p for p in self._cards_for(note_id) if self._patch_note_card(p, is_selected)]
+        if changed:
+            self.ui.request()
+    
+    def _hover_note(self, e, parts):
         """Handle note hover"""
-        if self.selected_note and self.selected_note.get("id") != card.key:
-            card.bgcolor = ft.colors.with_opacity(0.5, COLORS["primary"]) if e.data == "true" else COLORS["card"]
-            card.update()
+        if self.selected_note and self.selected_note.get("id") != parts["note"]["id"]:
+            parts["card"].bgcolor = ft.colors.with_opacity(0.5, COLORS["primary"]) if e.data == "true" else COLORS["card"]
+            self.ui.request(parts["card"])
     
     def _select_note(self, note):
         """Select a note"""
+        if self.autosave.has_pending():
+            self.page.run_task(self.autosave.flush)
+        self.save_status.value = ""
+        previous_id = self.selected_note.get("id") if self.selected_note else None
         self.selected_note = note
         self.note_title.value = note.get("title", "")
-        self.note_content.value = note.get("content", "")
+        self._show_note_body(note.get("content"), "Loading...")
+        if "content" not in note:
+            self.page.run_task(self._load_note_content, note)
+        else:
+            self.api.track_base(note)
+        self.api.remember_opened(note["id"])
         
         # Update lock icon
         self.lock_btn.icon = ft.icons.LOCK_ROUNDED if note.get("isLocked") else ft.icons.LOCK_OPEN_ROUNDED
         self.lock_btn.icon_color = COLORS["warning"] if note.get("isLocked") else COLORS["text_secondary"]
         
         # Show editor
-        self.editor_area.content = ft.Column(
-            controls=[
-                self.editor_toolbar,
-                self.editor_content,
-            ],
-            expand=True,
-        )
-        
-        self._render_notes()
+        self.editor_area.content = self.editor_view
+        
+        # Only the previously and newly selected cards change
+        for note_id in (previous_id, note["id"]):
+            for parts in self._cards_for(note_id):
+                self._patch_note_card(parts, note_id == note["id"])
+        self.ui.request()
+    
+    async def _load_note_content(self, note):
+        """Fill the editor once a summary note's body has loaded"""
+        content = await self.api.get_note_content(note)
+        if self.selected_note is not note or "content" in note:
+            return
+        if content is not None:
+            note["content"] = content
+            self.search_index.update(note)
+        self._show_note_body(content, "Note content is available when online")
+        self.ui.request()
+    
+    def _show_note_body(self, content: Optional[str], unavailable: str):
+        """Put a note's body in the editor, read-only while it isn't loaded
+
+        Typing over a missing body would save the partial text as the
+        whole note.
+        """
+        self.note_content.value = content or ""
+        self.note_content.read_only = content is None
+        self.note_content.hint_text = unavailable if content is None else "Start writing..."
     
     async def _create_note(self, e):
         """Create new note"""
@@ -1291,28 +3515,138 @@ class NoteXApp:
         
         result = await self.api.create_note("Untitled Note", "", self.user.get("id"))
         if result.get("note"):
-            self.notes.insert(0, result["note"])
-            self._select_note(result["note"])
+            note = Note.from_dict(result["note"])
+            self.notes.insert(0, note)
+            self.search_index.update(note)
             self._render_notes()
+            self._select_note(note)
+    
+    def _handle_note_event(self, kind: str, note_id: Optional[str]):
+        """Show a change pushed from the server without reloading the list"""
+        if kind == "resync":
+            self.page.run_task(self._load_notes)
+            return
+        
+        note = self.storage.get_note(note_id) if kind == "upsert" else None
+        current = next((n for n in self.notes if n["id"] == note_id), None)
+        if note is None:
+            if current is None:
+                return
+            self.notes.remove(current)
+            self.search_index.remove(note_id)
+            if current is self.selected_note:
+                self.autosave.discard(note_id)
+                self.selected_note = None
+                self.editor_area.content = self.empty_state
+                self.note_title.value = ""
+                self.note_content.value = ""
+                self._show_snackbar("Note was deleted elsewhere", COLORS["warning"])
+            self._render_notes()
+            return
+        
+        if current is None:
+            current = Note.from_dict(note)
+        elif current is self.selected_note and self.autosave.has_pending():
+            # Unsaved local edits win; they go up with the next save
+            return
+        else:
+            self.notes.remove(current)
+            if "content" not in note:
+                current.pop("content", None)
+            current.update(note)
+        self.notes.insert(0, current)
+        self.search_index.update(current)
+        
+        if current is self.selected_note:
+            self.note_title.value = current.get("title", "")
+            self._show_note_body(current.get("content"), "Loading...")
+            if "content" not in current:
+                self.page.run_task(self._load_note_content, current)
+        self._render_notes()
+    
+    def _handle_sync_conflict(self, note_id: str):
+        """Point out a note whose offline edits clashed with changes made elsewhere"""
+        note = self.storage.get_note(note_id) or {}
+        self._show_snackbar(
+            f"\"{note.get('title', 'Untitled')}\" was also changed elsewhere; both versions are kept in the note",
+            COLORS["warning"]
+        )
+    
+    def _handle_note_id_changed(self, offline_id: str, server_id: str):
+        """Follow a new note over to the id the server gave it"""
+        self.page.run_task(self._release_offline_id, offline_id, server_id)
+        note = next((n for n in self.notes if n["id"] == offline_id), None)
+        if not note:
+            return
+        # The server's push for the new note may have arrived first and added it under its id
+        duplicate = next((n for n in self.notes if n["id"] == server_id), None)
+        if duplicate:
+            self.notes.remove(duplicate)
+            self._note_cards.pop(server_id, None)
+            if duplicate is self.selected_note:
+                self.selected_note = note
+        self.search_index.remove(offline_id)
+        note["id"] = server_id
+        note.pop("offline", None)
+        self.search_index.update(note)
+        self.autosave.rename(offline_id, server_id)
+        parts = self._note_cards.pop(offline_id, None)
+        if parts:
+            self._note_cards[server_id] = parts
+        if duplicate:
+            self._render_notes()
+    
+    async def _release_offline_id(self, offline_id: str, server_id: str):
+        """Forget an offline id once a save already sent under it has finished"""
+        await self.autosave.settle(offline_id)
+        # A failed save puts its edits back under the old id
+        self.autosave.rename(offline_id, server_id)
+        self.api.forget_id(offline_id)
     
     async def _update_note_title(self, e):
         """Update note title"""
         if self.selected_note:
-            await self.api.update_note(
-                self.selected_note["id"],
-                {"title": self.note_title.value}
-            )
+            self.autosave.queue(self.selected_note["id"], {"title": self.note_title.value})
             self.selected_note["title"] = self.note_title.value
-            self._render_notes()
+            self.search_index.update(self.selected_note)
+            self._refresh_note_card(self.selected_note["id"])
     
     async def _update_note_content(self, e):
         """Update note content"""
-        if self.selected_note:
-            await self.api.update_note(
-                self.selected_note["id"],
-                {"content": self.note_content.value}
-            )
+        if self.selected_note and not self.note_content.read_only:
+            self.autosave.queue(self.selected_note["id"], {"content": self.note_content.value})
             self.selected_note["content"] = self.note_content.value
+            self.search_index.update(self.selected_note)
+            self._refresh_note_card(self.selected_note["id"])
+    
+    async def _flush_edits(self, e=None):
+        """Save buffered editor changes straight away"""
+        await self.autosave.flush()
+    
+    def _show_save_state(self, state: str):
+        """Update the saving/saved indicator"""
+        if state == "saving":
+            label = "Saving..."
+        elif state == "saved":
+            label = "Saved" if self.api.is_online else "Saved locally"
+        elif state == "rejected":
+            label = "Not saved"
+            self._show_snackbar("Your changes couldn't be saved: the note was deleted or you no longer have access", COLORS["error"])
+        else:
+            label = "Save failed, retrying"
+        if self.save_status.value != label:
+            self.save_status.value = label
+            self.ui.request()
+    
+    def _handle_disconnect(self, e):
+        """Keep unsaved edits and pending writes when the window closes"""
+        for note_id, data in self.autosave.drain().items():
+            self.api.queue_offline_update(note_id, data)
+        self.storage.flush()
+    
+    def _handle_connect(self, e):
+        """Send edits queued at disconnect once a web session resumes"""
+        self.page.run_task(self.api.sync_offline_changes)
     
     def _handle_search(self, e):
         """Handle search"""
@@ -1365,7 +3699,7 @@ class NoteXApp:
             self.selected_note["password"] = self.lock_password.value
             self.lock_btn.icon = ft.icons.LOCK_ROUNDED
             self.lock_btn.icon_color = COLORS["warning"]
-            self._render_notes()
+            self._refresh_note_card(self.selected_note["id"])
             self._show_snackbar("Note locked!", COLORS["success"])
         
         self._close_dialog()
@@ -1430,8 +3764,14 @@ class NoteXApp:
     async def _delete_note(self, e):
         """Delete note"""
         if self.selected_note:
-            await self.api.delete_note(self.selected_note["id"])
+            self.autosave.discard(self.selected_note["id"])
+            result = await self.api.delete_note(self.selected_note["id"])
+            if result.get("error"):
+                self._close_dialog()
+                self._show_snackbar(result["error"], COLORS["error"])
+                return
             self.notes = [n for n in self.notes if n["id"] != self.selected_note["id"]]
+            self.search_index.remove(self.selected_note["id"])
             self.selected_note = None
             
             # Show empty state
@@ -1451,33 +3791,33 @@ class NoteXApp:
     def _show_offline_overlay(self):
         """Show offline overlay"""
         self.offline_overlay.visible = True
-        self.page.update()
+        self.ui.request()
     
     def _hide_offline_overlay(self):
         """Hide offline overlay"""
         self.offline_overlay.visible = False
-        self.page.update()
+        self.ui.request()
     
     def _show_offline_indicator(self):
         """Show offline indicator"""
         self.offline_indicator.visible = True
-        self.page.update()
+        self.ui.request()
     
     def _hide_offline_indicator(self):
         """Hide offline indicator"""
         self.offline_indicator.visible = False
-        self.page.update()
+        self.ui.request()
     
     def _show_offline_popup(self, message: str = None):
         """Show offline popup"""
         self.popup_message.value = message or "This feature requires an internet connection."
         self.offline_popup.visible = True
-        self.page.update()
+        self.ui.request()
     
     def _hide_offline_popup(self):
         """Hide offline popup"""
         self.offline_popup.visible = False
-        self.page.update()
+        self.ui.request()
     
     def _show_snackbar(self, message: str, color: str = COLORS["primary"]):
         """Show snackbar"""
@@ -1487,7 +3827,7 @@ class NoteXApp:
             duration=3000,
         )
         self.page.snack_bar.open = True
-        self.page.update()
+        self.ui.request()
 
 
 # ============================================
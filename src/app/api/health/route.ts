@@ -0,0 +1,9 @@
+import { NextResponse } from 'next/server';
+
+// Liveness probe for clients polling connectivity. Must not touch the database.
+export async function GET() {
+  return NextResponse.json(
+    { status: 'ok' },
+    { headers: { 'Cache-Control': 'no-store' } }
+  );
+}
@@ -1,5 +1,17 @@
+import { createHash } from 'crypto';
 import { NextRequest, NextResponse } from 'next/server';
 import { prisma } from '@/lib/db';
+import { publishNoteEvent, publishNoteUpsert } from '@/lib/note-events';
+
+// Single splice applied to the stored content: content[start:end] -> text.
+// Offsets are UTF-16 code units, baseHash is the sha256 of the content the
+// client diffed against.
+interface ContentPatch {
+  start: number;
+  end: number;
+  text: string;
+  baseHash: string;
+}
 
 export async function GET(
   request: NextRequest,
@@ -35,6 +47,18 @@ export async function PUT(
     const { id } = await params;
     const body = await request.json();
     const { title, content, isLocked, password } = body;
+    const contentPatch: ContentPatch | undefined = body.contentPatch;
+    // Offline edits name the version they were made on; a newer server copy
+    // is refused with 409 and sent back so the client can merge
+    const baseUpdatedAt: string | undefined = body.baseUpdatedAt;
+    const base = baseUpdatedAt !== undefined ? new Date(baseUpdatedAt) : undefined;
+
+    if (base && isNaN(base.getTime())) {
+      return NextResponse.json(
+        { error: 'Invalid baseUpdatedAt' },
+        { status: 400 }
+      );
+    }
 
     const updateData: {
       title?: string;
@@ -54,10 +78,89 @@ export async function PUT(
       }
     }
 
-    const note = await prisma.note.update({
-      where: { id },
-      data: updateData,
-    });
+    if (contentPatch !== undefined) {
+      const current = await prisma.note.findUnique({
+        where: { id },
+        select: { content: true, updatedAt: true },
+      });
+
+      if (!current) {
+        return NextResponse.json({ error: 'Note not found' }, { status: 404 });
+      }
+
+      const { start, end, text, baseHash } = contentPatch;
+      const hash = createHash('sha256').update(current.content, 'utf8').digest('hex');
+      if (
+        hash !== baseHash ||
+        (base && current.updatedAt.getTime() !== base.getTime()) ||
+        !Number.isInteger(start) ||
+        !Number.isInteger(end) ||
+        start < 0 ||
+        start > end ||
+        end > current.content.length ||
+        typeof text !== 'string'
+      ) {
+        return NextResponse.json(
+          { error: 'Base version mismatch' },
+          { status: 409 }
+        );
+      }
+
+      const content = current.content.slice(0, start) + text + current.content.slice(end);
+      updateData.content = content;
+
+      // Only write if nobody else changed the note since it was read
+      const { count } = await prisma.note.updateMany({
+        where: { id, updatedAt: current.updatedAt },
+        data: updateData,
+      });
+
+      if (count === 0) {
+        return NextResponse.json(
+          { error: 'Base version mismatch' },
+          { status: 409 }
+        );
+      }
+
+      // The client already has the content it patched, so leave it out
+      const note = await prisma.note.findUnique({
+        where: { id },
+        omit: { content: true },
+      });
+
+      if (note) {
+        publishNoteUpsert({ ...note, content });
+      }
+
+      return NextResponse.json({ note });
+    }
+
+    if (base) {
+      const { count } = await prisma.note.updateMany({
+        where: { id, updatedAt: base },
+        data: updateData,
+      });
+
+      if (count === 0) {
+        const current = await prisma.note.findUnique({ where: { id } });
+        if (!current) {
+          return NextResponse.json({ error: 'Note not found' }, { status: 404 });
+        }
+        return NextResponse.json(
+          { error: 'Version conflict', note: current },
+          { status: 409 }
+        );
+      }
+    }
+
+    const note = base
+      ? await prisma.note.findUniqueOrThrow({ where: { id } })
+      : await prisma.note.update({
+          where: { id },
+          data: updateData,
+        });
+
+    publishNoteUpsert(note);
 
     return NextResponse.json({ note });
   } catch (error) {
@@ -76,10 +179,12 @@ export async function DELETE(
   try {
     const { id } = await params;
 
-    await prisma.note.delete({
+    const note = await prisma.note.delete({
       where: { id },
     });
 
+    publishNoteEvent(note.authorId, { type: 'delete', id });
+
     return NextResponse.json({ message: 'Note deleted' });
   } catch (error) {
     console.error('Delete note error:', error);
@@ -1,10 +1,30 @@
+import { createHash } from 'crypto';
 import { NextRequest, NextResponse } from 'next/server';
 import { prisma } from '@/lib/db';
+import { publishNoteUpsert } from '@/lib/note-events';
+import { toSummary } from '@/lib/notes';
+
+// JSON response with a body-hash ETag; a matching If-None-Match gets an
+// empty 304 so the client keeps the copy it already has
+function jsonWithETag(request: NextRequest, body: unknown) {
+  const json = JSON.stringify(body);
+  const etag = `W/"${createHash('sha1').update(json).digest('base64url')}"`;
+  const headers = { ETag: etag, 'Cache-Control': 'private, no-cache' };
+
+  if (request.headers.get('if-none-match') === etag) {
+    return new NextResponse(null, { status: 304, headers });
+  }
+  return new NextResponse(json, {
+    headers: { ...headers, 'Content-Type': 'application/json' },
+  });
+}
 
 export async function GET(request: NextRequest) {
   try {
     const { searchParams } = new URL(request.url);
     const authorId = searchParams.get('authorId');
+    const updatedSince = searchParams.get('updatedSince');
+    const summary = searchParams.get('fields') === 'summary';
 
     if (!authorId) {
       return NextResponse.json(
@@ -13,12 +33,40 @@ export async function GET(request: NextRequest) {
       );
     }
 
+    // Delta sync: only notes changed since the client's cursor, plus the
+    // ids of all live notes so the client can drop ones deleted elsewhere
+    if (updatedSince) {
+      const since = new Date(updatedSince);
+      if (isNaN(since.getTime())) {
+        return NextResponse.json(
+          { error: 'Invalid updatedSince' },
+          { status: 400 }
+        );
+      }
+
+      const [notes, live] = await Promise.all([
+        prisma.note.findMany({
+          where: { authorId, updatedAt: { gte: since } },
+          orderBy: { updatedAt: 'asc' },
+        }),
+        prisma.note.findMany({
+          where: { authorId },
+          select: { id: true },
+        }),
+      ]);
+
+      return jsonWithETag(request, {
+        notes: summary ? notes.map(toSummary) : notes,
+        ids: live.map((note) => note.id),
+      });
+    }
+
     const notes = await prisma.note.findMany({
       where: { authorId },
       orderBy: { createdAt: 'desc' },
     });
 
-    return NextResponse.json({ notes });
+    return jsonWithETag(request, { notes: summary ? notes.map(toSummary) : notes });
   } catch (error) {
     console.error('Get notes error:', error);
     return NextResponse.json(
@@ -54,6 +102,8 @@ export async function POST(request: NextRequest) {
       },
     });
 
+    publishNoteUpsert(note);
+
     return NextResponse.json({ note }, { status: 201 });
   } catch (error) {
     console.error('Create note error:', error);
@@ -0,0 +1,24 @@
+import { toSummary } from '@/lib/notes';
+
+// Publish endpoint of the note-events mini-service, which pushes each event
+// to the author's connected clients over socket.io
+const NOTE_EVENTS_URL = process.env.NOTE_EVENTS_URL || 'http://127.0.0.1:3004/publish';
+
+export type NoteEvent =
+  | { type: 'upsert'; note: ReturnType<typeof toSummary> }
+  | { type: 'delete'; id: string };
+
+// Fire and forget: a change is never failed because nobody is listening
+export function publishNoteEvent(authorId: string, event: NoteEvent) {
+  fetch(NOTE_EVENTS_URL, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ authorId, event }),
+  }).catch((error) => {
+    console.error('Publish note event error:', error);
+  });
+}
+
+export function publishNoteUpsert(note: Parameters<typeof toSummary>[0]) {
+  publishNoteEvent(note.authorId, { type: 'upsert', note: toSummary(note) });
+}
@@ -0,0 +1,22 @@
+export const PREVIEW_LENGTH = 80;
+
+// List view shape: everything but the full body
+export function toSummary(note: {
+  id: string;
+  title: string;
+  content: string;
+  isLocked: boolean;
+  authorId: string;
+  createdAt: Date;
+  updatedAt: Date;
+}) {
+  return {
+    id: note.id,
+    title: note.title,
+    preview: note.content.slice(0, PREVIEW_LENGTH),
+    isLocked: note.isLocked,
+    authorId: note.authorId,
+    createdAt: note.createdAt,
+    updatedAt: note.updatedAt,
+  };
+}